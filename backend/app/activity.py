@@ -0,0 +1,77 @@
+import threading
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from .config import settings
+from .db.models import ModelUser
+from .environments import LRUCache
+
+
+def model_users_insert(dialect: str):
+    """An INSERT into model_users supporting ON CONFLICT on `dialect`."""
+    return (postgresql.insert if dialect == "postgresql" else sqlite.insert)(ModelUser)
+
+
+def widen_on_conflict(statement, dialect: str):
+    """
+    Make an INSERT into model_users widen the first_seen/last_seen of the rows that already exist.
+    """
+    # GREATEST/LEAST are spelled as the multi-argument MAX/MIN on SQLite
+    greatest, least = (func.greatest, func.least) if dialect == "postgresql" else (func.max, func.min)
+    return statement.on_conflict_do_update(
+        index_elements=[ModelUser.model_id, ModelUser.machine_id],
+        set_={
+            "first_seen": least(ModelUser.first_seen, statement.excluded.first_seen),
+            "last_seen": greatest(ModelUser.last_seen, statement.excluded.last_seen),
+        },
+    )
+
+
+def upsert_model_user(db: Session, model_id: int, machine_id: str, timestamp: datetime) -> None:
+    """
+    Insert the (model, machine) pair or widen its first_seen/last_seen to include `timestamp`.
+    """
+    dialect = db.get_bind().dialect.name
+    statement = model_users_insert(dialect).values(
+        model_id=model_id, machine_id=machine_id, first_seen=timestamp, last_seen=timestamp
+    )
+    db.execute(widen_on_conflict(statement, dialect))
+
+
+class UserActivityTracker:
+    """
+    Keeps the model_users table current as reports are ingested.
+
+    Cohort metrics only need day resolution, so a machine's row is upserted on its first report
+    of each day and later reports that day are skipped. last_seen is therefore accurate to the day.
+    """
+
+    def __init__(self, max_size: int):
+        self.lock = threading.Lock()
+        self.seen = LRUCache(max_size)
+
+    def record(self, db: Session, model_id: int, machine_id: str, timestamp: datetime) -> bool:
+        """
+        Upsert the machine's row in the caller's transaction unless it is known to be current.
+
+        Returns:
+        - bool: Whether an upsert was issued; pass the same arguments to `committed` once it commits
+        """
+        day = timestamp.date()
+        with self.lock:
+            known = self.seen.get((model_id, machine_id))
+        if known is not None and known[0] <= day <= known[1]:
+            return False
+        upsert_model_user(db, model_id, machine_id, timestamp)
+        return True
+
+    def committed(self, model_id: int, machine_id: str, timestamp: datetime) -> None:
+        day = timestamp.date()
+        key = (model_id, machine_id)
+        with self.lock:
+            first_day, last_day = self.seen.get(key, (day, day))
+            self.seen.set(key, (min(first_day, day), max(last_day, day)))
+
+
+activity = UserActivityTracker(settings.ACTIVITY_CACHE_SIZE)
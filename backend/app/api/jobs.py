@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..db.database import get_db
+from ..db.models import Job
+from ..schemas.job import JobOut
+from .auth import get_current_user
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def read_job(job_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    db_job = db.query(Job).filter(Job.id == job_id).first()
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
@@ -1,16 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import func, case, update
+from typing import List, Literal
 from datetime import datetime, timedelta
 from ..db.database import get_db
-from ..db.models import Model, Report
-from ..schemas.model import ModelCreate, ModelOut, MethodHistory, DailyCount
+from ..db.models import Model, ModelUser, Report, Environment, Job
+from ..db.maintenance import create_job, run_model_deletion
+from ..schemas.model import ModelCreate, ModelOut, MethodHistory, DailyCount, UserActivity, RetentionCohort
+from ..schemas.job import JobOut
+from ..schemas.monitor import ErrorRate
+from ..schemas.environment import EnvironmentFacet, FacetBreakdown
+from ..monitor import monitor
+from ..serialization import FastJSONResponse, rows_to_dicts
+from .. import archive
 from .auth import get_current_user
 
 router = APIRouter()
 
 
+def get_model(db: Session, model_name: str) -> Model:
+    """
+    Look up a model by name for reading. A model being deleted is left out: its reports are
+    removed in batches, so anything read from them would be partial.
+
+    Raises:
+    - HTTPException: 404 if the model is not found or is being deleted
+    """
+    db_model = db.query(Model).filter(Model.name == model_name, Model.deletion_job_id.is_(None)).first()
+    if db_model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return db_model
+
+
 @router.post("/", response_model=ModelOut)
 def create_model(model: ModelCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     db_model = Model(**model.dict())
@@ -23,8 +44,9 @@ def create_model(model: ModelCreate, db: Session = Depends(get_db), current_user
 @router.get("/", response_model=List[ModelOut])
 def read_models(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     try:
-        models = db.query(Model).offset(skip).limit(limit).all()
-        return models
+        models = db.query(Model.id, Model.name, Model.created_at) \
+            .filter(Model.deletion_job_id.is_(None)).offset(skip).limit(limit).all()
+        return FastJSONResponse(rows_to_dicts(models, ("id", "name", "created_at")))
     except Exception as e:
         print(f"Database query failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Database query failed")
@@ -32,18 +54,13 @@ def read_models(skip: int = 0, limit: int = 100, db: Session = Depends(get_db),
 
 @router.get("/{model_name}", response_model=ModelOut)
 def read_model(model_name: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    db_model = db.query(Model).filter(Model.name == model_name).first()
-    if db_model is None:
-        raise HTTPException(status_code=404, detail="Model not found")
-    return db_model
+    return get_model(db, model_name)
 
 
 @router.put("/{model_name}", response_model=ModelOut)
 def update_model(model_name: str, model: ModelCreate, db: Session = Depends(get_db),
                  current_user=Depends(get_current_user)):
-    db_model = db.query(Model).filter(Model.name == model_name).first()
-    if db_model is None:
-        raise HTTPException(status_code=404, detail="Model not found")
+    db_model = get_model(db, model_name)
     for key, value in model.dict().items():
         setattr(db_model, key, value)
     db.commit()
@@ -51,14 +68,40 @@ def update_model(model_name: str, model: ModelCreate, db: Session = Depends(get_
     return db_model
 
 
-@router.delete("/{model_name}", response_model=ModelOut)
-def delete_model(model_name: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+@router.delete("/{model_name}", response_model=JobOut, status_code=202)
+def delete_model(model_name: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db),
+                 current_user=Depends(get_current_user)):
+    """
+    Schedule the deletion of a model and all of its reports.
+
+    Reports are removed in bounded batches by a background job; poll `/jobs/{job_id}` for its status.
+    Until the job finishes the model is left out of listings and refuses new reports. Deleting a
+    model that is already being deleted returns the running job rather than starting another.
+
+    Returns:
+    - JobOut: The scheduled (or already running) deletion job
+
+    Raises:
+    - HTTPException: 404 if the model is not found
+    """
     db_model = db.query(Model).filter(Model.name == model_name).first()
     if db_model is None:
         raise HTTPException(status_code=404, detail="Model not found")
-    db.delete(db_model)
-    db.commit()
-    return db_model
+    if db_model.deletion_job_id is None:
+        job = create_job(db, "delete_model", target=model_name)
+        # Conditional, so concurrent requests agree on a single job
+        claimed = db.execute(
+            update(Model).where(Model.id == db_model.id, Model.deletion_job_id.is_(None))
+            .values(deletion_job_id=job.id).execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            db.commit()
+            background_tasks.add_task(run_model_deletion, job.id, db_model.id)
+            return job
+        db.delete(job)
+        db.commit()
+        db.refresh(db_model)
+    return db.get(Job, db_model.deletion_job_id)
 
 
 @router.get("/{model_name}/unique_users", response_model=int)
@@ -70,6 +113,8 @@ def get_unique_users(
     """
     Get the number of unique users (machine_ids) for a specific model.
 
+    Counted from the model_users table, so the cost grows with users rather than reports.
+
     Args:
     - model_name (str): The name of the model
 
@@ -79,17 +124,152 @@ def get_unique_users(
     Raises:
     - HTTPException: 404 if the model is not found
     """
-    db_model = db.query(Model).filter(Model.name == model_name).first()
-    if db_model is None:
-        raise HTTPException(status_code=404, detail="Model not found")
+    db_model = get_model(db, model_name)
 
-    unique_users = db.query(func.count(func.distinct(Report.machine_id))) \
-        .filter(Report.model_id == db_model.id) \
+    unique_users = db.query(func.count()) \
+        .select_from(ModelUser) \
+        .filter(ModelUser.model_id == db_model.id) \
         .scalar()
 
     return unique_users
 
 
+@router.get("/{model_name}/users/activity", response_model=UserActivity)
+def get_user_activity(
+        model_name: str,
+        start_date: datetime = Query(default=None),
+        end_date: datetime = Query(default=None),
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user)
+):
+    """
+    Get the new and returning users of a model over a time range.
+
+    A user is new if its first report falls within the range and returning if it reported before
+    the range and again since its start. Computed from the model_users table.
+
+    Args:
+    - model_name (str): The name of the model
+    - start_date (datetime, optional): The start of the range (defaults to one month ago)
+    - end_date (datetime, optional): The end of the range (defaults to current date)
+
+    Returns:
+    - UserActivity: New and returning user counts, and the new users per day
+
+    Raises:
+    - HTTPException: 404 if the model is not found
+    """
+    db_model = get_model(db, model_name)
+
+    if not start_date:
+        start_date = datetime.utcnow() - timedelta(days=30)
+    if not end_date:
+        end_date = datetime.utcnow()
+
+    returning_users = db.query(func.count()) \
+        .select_from(ModelUser) \
+        .filter(ModelUser.model_id == db_model.id, ModelUser.first_seen < start_date, ModelUser.last_seen >= start_date) \
+        .scalar()
+    first_day = func.date_trunc('day', ModelUser.first_seen, type_=ModelUser.first_seen.type)
+    daily_new_users = db.query(first_day.label('date'), func.count().label('count')) \
+        .filter(ModelUser.model_id == db_model.id, ModelUser.first_seen.between(start_date, end_date)) \
+        .group_by(first_day) \
+        .order_by(first_day) \
+        .all()
+
+    return UserActivity(
+        new_users=sum(day.count for day in daily_new_users),
+        returning_users=returning_users,
+        daily_new_users=[DailyCount(date=day.date.strftime("%Y-%m-%d"), count=day.count) for day in daily_new_users],
+    )
+
+
+def _truncate(timestamp: datetime, period: str) -> datetime:
+    """Python counterpart of date_trunc for day, week (starting on Monday) and month."""
+    day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "month":
+        return day.replace(day=1)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _period_index(start: datetime, end: datetime, period: str) -> int:
+    """Number of whole periods between two period-truncated timestamps."""
+    if period == "month":
+        return (end.year - start.year) * 12 + end.month - start.month
+    days = (end.date() - start.date()).days
+    return days // 7 if period == "week" else days
+
+
+@router.get("/{model_name}/users/retention", response_model=List[RetentionCohort])
+def get_retention(
+        model_name: str,
+        period: Literal["day", "week", "month"] = "week",
+        periods: int = Query(default=8, ge=1, le=52),
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user)
+):
+    """
+    Get the retention matrix of a model's users, grouped into cohorts by the period of their first report.
+
+    `retained[n]` is the number of users of a cohort still reporting n periods or more after the
+    start of their cohort, i.e. whose last report falls in period n or later. Each cohort only
+    lists the periods that have started. Computed from the model_users table with one GROUP BY
+    over (cohort, last active period).
+
+    Args:
+    - model_name (str): The name of the model
+    - period (str, optional): The cohort and retention period: day, week or month (defaults to week)
+    - periods (int, optional): The number of most recent cohorts, and of periods per cohort (defaults to 8)
+
+    Returns:
+    - List[RetentionCohort]: One row per cohort, oldest first
+
+    Raises:
+    - HTTPException: 404 if the model is not found
+    """
+    db_model = get_model(db, model_name)
+
+    current = _truncate(datetime.utcnow(), period)
+    if period == "month":
+        months = current.year * 12 + current.month - 1 - (periods - 1)
+        since = current.replace(year=months // 12, month=months % 12 + 1)
+    else:
+        since = current - timedelta(days=(periods - 1) * (7 if period == "week" else 1))
+
+    cohort = func.date_trunc(period, ModelUser.first_seen, type_=ModelUser.first_seen.type)
+    last_active = func.date_trunc(period, ModelUser.last_seen, type_=ModelUser.last_seen.type)
+    rows = db.query(cohort.label('cohort'), last_active.label('last_active'), func.count().label('count')) \
+        .filter(ModelUser.model_id == db_model.id, ModelUser.first_seen >= since) \
+        .group_by(cohort, last_active) \
+        .all()
+
+    # Users per (cohort, index of the last active period), then suffix sums give retention
+    last_active_counts = {}
+    for row in rows:
+        counts = last_active_counts.setdefault(row.cohort, [0] * periods)
+        index = min(_period_index(row.cohort, row.last_active, period), periods - 1)
+        counts[index] += row.count
+
+    matrix = []
+    for cohort_start in sorted(last_active_counts):
+        counts = last_active_counts[cohort_start]
+        elapsed = min(_period_index(cohort_start, current, period) + 1, periods)
+        retained = []
+        total = 0
+        for count in reversed(counts):
+            total += count
+            retained.append(total)
+        retained.reverse()
+        matrix.append(RetentionCohort(
+            cohort=cohort_start.strftime("%Y-%m-%d"),
+            size=retained[0],
+            retained=retained[:elapsed],
+        ))
+    return matrix
+
+
 @router.get("/{model_name}/history", response_model=List[MethodHistory])
 def get_method_history(
         model_name: str,
@@ -101,6 +281,8 @@ def get_method_history(
     """
     Get the number of calls to different model methods over time for a specific model.
 
+    Archived months within the range are included, aggregated from their Parquet files.
+
     Args:
     - model_name (str): The name of the model
     - start_date (datetime, optional): The start date for the history (defaults to one month ago)
@@ -112,34 +294,135 @@ def get_method_history(
     Raises:
     - HTTPException: 404 if the model is not found
     """
-    db_model = db.query(Model).filter(Model.name == model_name).first()
-    if db_model is None:
-        raise HTTPException(status_code=404, detail="Model not found")
+    db_model = get_model(db, model_name)
 
     if not start_date:
         start_date = datetime.utcnow() - timedelta(days=30)
     if not end_date:
         end_date = datetime.utcnow()
 
+    day = func.date_trunc('day', Report.timestamp, type_=Report.timestamp.type)
     reports = db.query(
-        func.date_trunc('day', Report.timestamp).label('date'),
+        day.label('date'),
         Report.method,
         func.count().label('count')
     ).filter(
         Report.model_id == db_model.id,
         Report.timestamp.between(start_date, end_date)
     ).group_by(
-        func.date_trunc('day', Report.timestamp),
+        day,
         Report.method
     ).all()
 
+    # Archived months are aggregated from their Parquet files and added to the live counts
+    daily_counts = {}
+    archived = archive.query(db_model.id, start_date, end_date,
+                             "date_trunc('day', timestamp), method, count(*)", "1, 2")
+    for date, method, count in [(report.date, report.method, report.count) for report in reports] + archived:
+        key = (method, date.strftime("%Y-%m-%d"))
+        daily_counts[key] = daily_counts.get(key, 0) + count
+
     method_history = {}
-    for report in reports:
-        if report.method not in method_history:
-            method_history[report.method] = []
-        method_history[report.method].append(DailyCount(
-            date=report.date.strftime("%Y-%m-%d"),
-            count=report.count
-        ))
+    for (method, date), count in sorted(daily_counts.items()):
+        if method not in method_history:
+            method_history[method] = []
+        method_history[method].append({"date": date, "count": count})
+
+    return FastJSONResponse([{"method": method, "history": history} for method, history in method_history.items()])
+
+
+@router.get("/{model_name}/error_rates", response_model=List[ErrorRate])
+def get_error_rates(
+        model_name: str,
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user)
+):
+    """
+    Get the current sliding-window error rate of each method of a model.
+
+    The rates come from in-memory counters maintained by the ingestion endpoint over the
+    last ALERT_WINDOW seconds, so no reports are queried.
+
+    Args:
+    - model_name (str): The name of the model
+
+    Returns:
+    - List[ErrorRate]: Success/fail counts, error rate and firing alert rules per method
+
+    Raises:
+    - HTTPException: 404 if the model is not found
+    """
+    get_model(db, model_name)
+
+    return monitor.error_rates(model_name)
+
+
+@router.get("/{model_name}/breakdown", response_model=List[FacetBreakdown])
+def get_environment_breakdown(
+        model_name: str,
+        facet: EnvironmentFacet,
+        start_date: datetime = Query(default=None),
+        end_date: datetime = Query(default=None),
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user)
+):
+    """
+    Get the success and failure counts of a model grouped by one environment facet.
+
+    Facets are extracted from env_info into the environments table at ingestion, so this is a
+    GROUP BY over the indexed environment_id, in the reports table and in the archived months.
+    Reports without a known environment are grouped under a null value.
+
+    Args:
+    - model_name (str): The name of the model
+    - facet (EnvironmentFacet): The facet to group by, e.g. python_version or torch_version
+    - start_date (datetime, optional): The start of the time range (defaults to one month ago)
+    - end_date (datetime, optional): The end of the time range (defaults to current date)
+
+    Returns:
+    - List[FacetBreakdown]: Success/fail counts and error rate per facet value, most failures first
+
+    Raises:
+    - HTTPException: 404 if the model is not found
+    """
+    db_model = get_model(db, model_name)
+
+    if not start_date:
+        start_date = datetime.utcnow() - timedelta(days=30)
+    if not end_date:
+        end_date = datetime.utcnow()
+
+    # Count per environment id, over the reports table and the archived months, then map the ids
+    # to facet values with the small environments table
+    is_success = case((Report.status == "success", True), else_=False)
+    live = db.query(Report.environment_id, is_success, func.count()) \
+        .filter(Report.model_id == db_model.id, Report.timestamp.between(start_date, end_date)) \
+        .group_by(Report.environment_id, is_success) \
+        .all()
+    archived = archive.query(db_model.id, start_date, end_date,
+                             "environment_id, status = 'success', count(*)", "1, 2")
+
+    column = getattr(Environment, facet.value)
+    environment_ids = {environment_id for environment_id, _, _ in live + archived if environment_id is not None}
+    values = dict(db.query(Environment.id, column).filter(Environment.id.in_(environment_ids)).all())
+    counts = {}
+    for environment_id, success, count in live + archived:
+        value = values.get(environment_id)
+        value_counts = counts.setdefault(value, {"success": 0, "fail": 0})
+        value_counts["success" if success else "fail"] += count
+
+    def format_value(value):
+        if value is None:
+            return None
+        return str(value).lower() if isinstance(value, bool) else str(value)
 
-    return [MethodHistory(method=method, history=history) for method, history in method_history.items()]
\ No newline at end of file
+    rows = sorted(counts.items(), key=lambda item: item[1]["fail"], reverse=True)
+    return [
+        FacetBreakdown(
+            value=format_value(value),
+            success=value_counts["success"],
+            fail=value_counts["fail"],
+            error_rate=value_counts["fail"] / (value_counts["success"] + value_counts["fail"]),
+        )
+        for value, value_counts in rows
+    ]
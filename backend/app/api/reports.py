@@ -1,47 +1,169 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, delete, or_
 from sqlalchemy.orm import Session
 from typing import List
 from ..db.database import get_db
 from ..db.models import Report, Model
+from ..db.maintenance import create_job, run_retention_purge, run_archive, run_environment_backfill
+from .. import archive
 from ..schemas.report import ReportCreate, ReportOut
-from .auth import get_current_user
+from ..serialization import FastJSONResponse, rows_to_dicts
+from ..schemas.job import JobOut
+from ..config import settings
+from ..metrics import INGESTED_MODELS, REPORTS_INGESTED, REPORTS_REJECTED, UNKNOWN_MODEL, model_label
+from ..stream import broker, format_event
+from ..coordination import dispatcher
+from ..monitor import monitor
+from ..environments import environments
+from ..activity import activity
+from .auth import get_current_user, get_current_user_from_query
+from .model_routes import get_model
 
 router = APIRouter()
 
+# The columns of ReportOut, selected as plain tuples by the listing endpoint
+REPORT_OUT_FIELDS = tuple(ReportOut.model_fields)
+REPORT_OUT_COLUMNS = [getattr(Report, name) for name in REPORT_OUT_FIELDS]
+
 
 @router.post("/{model_name}/report", response_model=ReportOut)
 def create_report(model_name: str, report: ReportCreate, db: Session = Depends(get_db)):
     db_model = db.query(Model).filter(Model.name == model_name).first()
     if db_model is None:
+        REPORTS_REJECTED.labels(UNKNOWN_MODEL, "model_not_found").inc()
+        raise HTTPException(status_code=404, detail="Model not found")
+    if db_model.deletion_job_id is not None:
+        REPORTS_REJECTED.labels(model_label(model_name), "model_deleting").inc()
         raise HTTPException(status_code=404, detail="Model not found")
 
-    db_report = Report(**report.dict(), model_id=db_model.id)
+    environment_id = environments.resolve(db, db_model.id, report.machine_id, report.env_info)
+    db_report = Report(**report.dict(), model_id=db_model.id, environment_id=environment_id)
     db.add(db_report)
+    upserted = activity.record(db, db_model.id, report.machine_id, report.timestamp)
     db.commit()
+    if upserted:
+        activity.committed(db_model.id, report.machine_id, report.timestamp)
     db.refresh(db_report)
+    INGESTED_MODELS.add(model_name)
+    REPORTS_INGESTED.labels(model_name).inc()
+    # The report is stored: the live stream and alerts are best effort from here on
+    dispatcher.submit(broker.publish, model_name, db_report)
+    dispatcher.submit(monitor.record, model_name, db_report.method, db_report.status != "success")
     return db_report
 
 
+@router.get("/{model_name}/stream")
+def stream_reports(
+        model_name: str,
+        failures_only: bool = False,
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user_from_query)
+):
+    """
+    Stream new reports for a model as Server-Sent Events.
+
+    Emits a `report` event for every ingested report (only failures if `failures_only`) and a
+    `stats` event with the rolling success/fail counts every STREAM_STATS_INTERVAL seconds.
+    Events are served from the coordination layer, so connected dashboards cost no database
+    queries and see the reports ingested by every worker.
+
+    Args:
+    - model_name (str): The name of the model
+    - failures_only (bool, optional): Only stream reports whose status is not "success"
+    - token (str): Access token; EventSource can't send an Authorization header
+
+    Raises:
+    - HTTPException: 404 if the model is not found
+    """
+    get_model(db, model_name)
+    # Don't hold a pooled connection for the lifetime of the stream
+    db.close()
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        subscriber = broker.subscribe(model_name, failures_only)
+        next_stats = loop.time()
+        try:
+            while True:
+                timeout = next_stats - loop.time()
+                if timeout <= 0:
+                    stats = await asyncio.to_thread(broker.stats, model_name)
+                    if stats is not None:
+                        yield format_event("stats", {**stats, "dropped": subscriber.dropped})
+                    next_stats = loop.time() + settings.STREAM_STATS_INTERVAL
+                    continue
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{model_name}", response_model=List[ReportOut])
 def read_reports(
         model_name: str,
         skip: int = 0,
         limit: int = 100,
         status: str = None,
+        q: str = Query(None, min_length=3),
+        start_date: datetime = None,
+        end_date: datetime = None,
         db: Session = Depends(get_db),
         current_user=Depends(get_current_user)
 ):
-    db_model = db.query(Model).filter(Model.name == model_name).first()
-    if db_model is None:
-        raise HTTPException(status_code=404, detail="Model not found")
+    """
+    List the reports of a model, newest first, optionally filtered.
+
+    Args:
+    - model_name (str): The name of the model.
+    - skip (int): The number of reports to skip.
+    - limit (int): The maximum number of reports to return.
+    - status (str, optional): Only return reports with this status.
+    - q (str, optional): Case-insensitive substring searched in the error, traceback and method,
+      at least 3 characters (pg_trgm can't use its indexes for shorter patterns). Matches are ranked: error matches first, then method matches, then traceback-only matches.
+    - start_date (datetime, optional): Only return reports at or after this time.
+    - end_date (datetime, optional): Only return reports at or before this time.
+
+    Returns:
+    - List[ReportOut]: The matching reports.
 
-    query = db.query(Report).filter(Report.model_id == db_model.id)
+    Raises:
+    - HTTPException: If the model is not found.
+    """
+    db_model = get_model(db, model_name)
+
+    query = db.query(*REPORT_OUT_COLUMNS).filter(Report.model_id == db_model.id)
 
     if status:
         query = query.filter(Report.status == status)
+    if start_date:
+        query = query.filter(Report.timestamp >= start_date)
+    if end_date:
+        query = query.filter(Report.timestamp <= end_date)
+
+    order = [Report.timestamp.desc()]
+    if q:
+        # ILIKE with a leading wildcard is served by the trigram indexes on Postgres
+        pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        error_match = Report.error.ilike(pattern, escape="\\")
+        method_match = Report.method.ilike(pattern, escape="\\")
+        traceback_match = Report.traceback.ilike(pattern, escape="\\")
+        query = query.filter(or_(error_match, method_match, traceback_match))
+        rank = case((error_match, 2), else_=0) + case((method_match, 1), else_=0)
+        order.insert(0, rank.desc())
 
-    reports = query.order_by(Report.timestamp.desc()).offset(skip).limit(limit).all()
-    return reports
+    reports = query.order_by(*order).offset(skip).limit(limit).all()
+    return FastJSONResponse(rows_to_dicts(reports, REPORT_OUT_FIELDS))
 
 
 @router.get("/{report_id}", response_model=ReportOut)
@@ -54,9 +176,83 @@ def read_report(report_id: int, db: Session = Depends(get_db), current_user=Depe
 
 @router.delete("/{report_id}", response_model=ReportOut)
 def delete_report(report_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    db_report = db.query(Report).filter(Report.id == report_id).first()
+    db_report = db.execute(
+        delete(Report).where(Report.id == report_id).returning(*Report.__table__.columns)
+    ).mappings().first()
     if db_report is None:
         raise HTTPException(status_code=404, detail="Report not found")
-    db.delete(db_report)
     db.commit()
-    return db_report
\ No newline at end of file
+    return db_report
+
+
+@router.post("/purge", response_model=JobOut, status_code=202)
+def purge_reports(
+        background_tasks: BackgroundTasks,
+        older_than_days: int = None,
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user)
+):
+    """
+    Schedule a retention purge of the reports older than `older_than_days` days.
+
+    Args:
+    - older_than_days (int, optional): The retention window (defaults to REPORT_RETENTION_DAYS)
+
+    Returns:
+    - JobOut: The scheduled purge job; poll `/jobs/{job_id}` for its status
+
+    Raises:
+    - HTTPException: 400 if no retention window is given or configured
+    """
+    older_than_days = older_than_days or settings.REPORT_RETENTION_DAYS
+    if older_than_days <= 0:
+        raise HTTPException(status_code=400, detail="older_than_days must be a positive number of days")
+    job = create_job(db, "purge_reports", target=f"older_than_days={older_than_days}")
+    background_tasks.add_task(run_retention_purge, job.id, older_than_days)
+    return job
+
+
+@router.post("/archive", response_model=JobOut, status_code=202)
+def archive_reports(
+        background_tasks: BackgroundTasks,
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user)
+):
+    """
+    Schedule moving the closed months older than ARCHIVE_AFTER_DAYS days to the columnar archive.
+
+    Archived reports are removed from the reports table and stored as Parquet files under
+    ARCHIVE_DIR, partitioned by model and month. History and breakdown analytics keep covering
+    them; listing endpoints only serve the reports table.
+
+    Returns:
+    - JobOut: The scheduled archive job; poll `/jobs/{job_id}` for its status
+
+    Raises:
+    - HTTPException: 400 if no ARCHIVE_DIR is configured
+    """
+    if not archive.enabled():
+        raise HTTPException(status_code=400, detail="No ARCHIVE_DIR is configured")
+    job = create_job(db, "archive_reports")
+    background_tasks.add_task(run_archive, job.id)
+    return job
+
+
+@router.post("/environments/backfill", response_model=JobOut, status_code=202)
+def backfill_report_environments(
+        background_tasks: BackgroundTasks,
+        db: Session = Depends(get_db),
+        current_user=Depends(get_current_user)
+):
+    """
+    Schedule attributing the reports stored without an environment, such as those ingested
+    before environments were tracked, so the environment breakdown covers them.
+
+    Reports are processed in bounded batches; running it again only visits what is left.
+
+    Returns:
+    - JobOut: The scheduled backfill job; poll `/jobs/{job_id}` for its status
+    """
+    job = create_job(db, "backfill_environments")
+    background_tasks.add_task(run_environment_backfill, job.id)
+    return job
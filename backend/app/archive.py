@@ -0,0 +1,170 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import List, Optional
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .config import settings
+
+logger = logging.getLogger("app.archive")
+
+# Column order of the rows handed to write_part, matching SCHEMA
+COLUMNS = ("id", "machine_id", "status", "timestamp", "method", "error", "traceback", "env_info",
+           "model_id", "environment_id")
+
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("machine_id", pa.string()),
+    ("status", pa.string()),
+    # UTC, stored naive so comparisons never depend on the session time zone
+    ("timestamp", pa.timestamp("us")),
+    ("method", pa.string()),
+    ("error", pa.string()),
+    ("traceback", pa.string()),
+    ("env_info", pa.string()),
+    ("model_id", pa.int64()),
+    ("environment_id", pa.int64()),
+])
+
+
+def enabled() -> bool:
+    return bool(settings.ARCHIVE_DIR)
+
+
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def month_start(value: datetime) -> datetime:
+    return to_utc(value).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def model_dir(model_id: int) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, f"model_id={model_id}")
+
+
+def partition_dir(model_id: int, month: datetime) -> str:
+    return os.path.join(model_dir(model_id), f"month={month:%Y-%m}")
+
+
+def archived_months(model_id: int) -> List[datetime]:
+    if not enabled() or not os.path.isdir(model_dir(model_id)):
+        return []
+    months = []
+    for name in os.listdir(model_dir(model_id)):
+        if name.startswith("month="):
+            months.append(datetime.strptime(name[len("month="):], "%Y-%m"))
+    return sorted(months)
+
+
+def write_part(model_id: int, month: datetime, rows) -> str:
+    """
+    Write one chunk of a model's month of reports to a zstd-compressed Parquet file.
+
+    The file is named after the first report id of the chunk and renamed into place once
+    complete, so an archive run interrupted before deleting the chunk from the hot table
+    rewrites the same file on the next run instead of duplicating it.
+    """
+    columns = {name: [] for name in COLUMNS}
+    for row in rows:
+        for name, value in zip(COLUMNS, row):
+            if name == "timestamp":
+                value = to_utc(value)
+            elif name == "env_info" and value is not None:
+                value = json.dumps(value)
+            columns[name].append(value)
+
+    directory = partition_dir(model_id, month)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{columns['id'][0]}.parquet")
+    pq.write_table(pa.table(columns, schema=SCHEMA), path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def drop_model(model_id: int) -> None:
+    if enabled():
+        shutil.rmtree(model_dir(model_id), ignore_errors=True)
+
+
+def drop_months_before(cutoff: datetime) -> int:
+    """
+    Delete the archived months that end before `cutoff`, across all models.
+
+    Returns:
+    - int: The number of month partitions removed
+    """
+    if not enabled() or not os.path.isdir(settings.ARCHIVE_DIR):
+        return 0
+    cutoff = to_utc(cutoff)
+    dropped = 0
+    for name in os.listdir(settings.ARCHIVE_DIR):
+        if not name.startswith("model_id="):
+            continue
+        model_id = int(name[len("model_id="):])
+        for month in archived_months(model_id):
+            if next_month(month) <= cutoff:
+                shutil.rmtree(partition_dir(model_id, month), ignore_errors=True)
+                dropped += 1
+    return dropped
+
+
+def overlapping_files(model_id: int, start: datetime, end: datetime) -> List[str]:
+    """The Parquet files of the archived months that intersect [start, end]."""
+    start, end = to_utc(start), to_utc(end)
+    files = []
+    for month in archived_months(model_id):
+        if month <= end and next_month(month) > start:
+            directory = partition_dir(model_id, month)
+            files.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                         if name.endswith(".parquet"))
+    return files
+
+
+def query(model_id: int, start: datetime, end: datetime, select: str, group_by: str) -> list:
+    """
+    Aggregate the archived reports of a model within [start, end] with an embedded DuckDB.
+
+    Only the months overlapping the range are read, and of those only the columns the query uses.
+    Returns an empty list without opening DuckDB when nothing is archived for the range.
+    """
+    files = overlapping_files(model_id, start, end)
+    if not files:
+        return []
+    with duckdb.connect() as conn:
+        return conn.execute(
+            f"SELECT {select} FROM read_parquet(?) WHERE timestamp BETWEEN ? AND ? GROUP BY {group_by}",
+            [files, to_utc(start), to_utc(end)],
+        ).fetchall()
+
+
+async def archive_periodically(run, coordinator) -> None:
+    """
+    Call `run` in a worker thread every ARCHIVE_INTERVAL_HOURS hours.
+
+    Every worker runs this loop; each round only the worker that takes the coordinator's
+    `archive` lock runs the archive.
+    """
+    interval = settings.ARCHIVE_INTERVAL_HOURS * 3600
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await asyncio.to_thread(coordinator.acquire, "archive", interval * 0.9):
+                continue
+        except Exception as e:
+            logger.warning("Skipping the scheduled archive run, the coordinator can't be reached: %s", e)
+            continue
+        try:
+            await asyncio.to_thread(run)
+        except Exception:
+            logger.exception("Scheduled archive run failed")
@@ -9,5 +9,27 @@ class Settings(BaseSettings):
     CORS_ORIGINS: str = os.environ["CORS_ORIGINS"]
     BACKEND_HOST: str = os.environ["BACKEND_HOST"]
     BACKEND_PORT: int = int(os.environ.get("PORT", 8000))
+    DELETE_BATCH_SIZE: int = int(os.environ.get("DELETE_BATCH_SIZE", 5000))
+    REPORT_RETENTION_DAYS: int = int(os.environ.get("REPORT_RETENTION_DAYS", 0))
+    SLOW_QUERY_MS: int = int(os.environ.get("SLOW_QUERY_MS", 500))
+    SLOW_QUERY_EXPLAIN: bool = os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    STREAM_BUFFER_SIZE: int = int(os.environ.get("STREAM_BUFFER_SIZE", 100))
+    STREAM_STATS_WINDOW: int = int(os.environ.get("STREAM_STATS_WINDOW", 60))
+    STREAM_STATS_INTERVAL: float = float(os.environ.get("STREAM_STATS_INTERVAL", 5))
+    ALERT_WINDOW: int = int(os.environ.get("ALERT_WINDOW", 300))
+    ALERT_RULES: str = os.environ.get("ALERT_RULES", "[]")
+    ENVIRONMENT_CACHE_SIZE: int = int(os.environ.get("ENVIRONMENT_CACHE_SIZE", 10000))
+    ENVIRONMENT_LOOKBACK_DAYS: int = int(os.environ.get("ENVIRONMENT_LOOKBACK_DAYS", 30))
+    ENVIRONMENT_MISS_TTL: float = float(os.environ.get("ENVIRONMENT_MISS_TTL", 60))
+    ACTIVITY_CACHE_SIZE: int = int(os.environ.get("ACTIVITY_CACHE_SIZE", 100000))
+    ARCHIVE_DIR: str = os.environ.get("ARCHIVE_DIR", "")
+    ARCHIVE_AFTER_DAYS: int = int(os.environ.get("ARCHIVE_AFTER_DAYS", 90))
+    ARCHIVE_FILE_ROWS: int = int(os.environ.get("ARCHIVE_FILE_ROWS", 100000))
+    ARCHIVE_INTERVAL_HOURS: float = float(os.environ.get("ARCHIVE_INTERVAL_HOURS", 0))
+    WORKERS: int = int(os.environ.get("WORKERS", 1))
+    DB_CONNECTION_BUDGET: int = int(os.environ.get("DB_CONNECTION_BUDGET", 20))
+    SCHEMA_SETUP: bool = os.environ.get("SCHEMA_SETUP", "true").lower() == "true"
+    COORDINATION_URL: str = os.environ.get("COORDINATION_URL", "")
+    ALERT_EVAL_INTERVAL: float = float(os.environ.get("ALERT_EVAL_INTERVAL", 1))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,277 @@
+import logging
+import math
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from .config import settings
+
+logger = logging.getLogger("app.coordination")
+
+# Called with the key a message was published under and the message itself
+Handler = Callable[[str, str], None]
+
+
+class RollingCounter:
+    """
+    Success/failure counts over the last `window` seconds, kept in one-second buckets.
+
+    Running totals are maintained as buckets expire, so both recording and reading are
+    amortized O(1).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.success = [0] * window
+        self.fail = [0] * window
+        self.success_total = 0
+        self.fail_total = 0
+        self.last = 0
+
+    def _advance(self, now: int) -> None:
+        if now <= self.last:
+            return
+        if now - self.last >= self.window:
+            self.success = [0] * self.window
+            self.fail = [0] * self.window
+            self.success_total = self.fail_total = 0
+        else:
+            for second in range(self.last + 1, now + 1):
+                index = second % self.window
+                self.success_total -= self.success[index]
+                self.fail_total -= self.fail[index]
+                self.success[index] = self.fail[index] = 0
+        self.last = now
+
+    def record(self, failed: bool, now: Optional[float] = None) -> None:
+        # Never write behind the newest bucket: it may already have been recycled
+        now = max(int(now if now is not None else time.time()), self.last)
+        self._advance(now)
+        index = now % self.window
+        if failed:
+            self.fail[index] += 1
+            self.fail_total += 1
+        else:
+            self.success[index] += 1
+            self.success_total += 1
+
+    def totals(self, now: Optional[float] = None) -> Dict[str, int]:
+        self._advance(int(now if now is not None else time.time()))
+        return {"success": self.success_total, "fail": self.fail_total}
+
+
+class LocalCoordinator:
+    """
+    In-process implementation of the coordination layer, for a single worker and for tests.
+
+    The coordination layer is what the stream broker, the error-rate monitor and the archive
+    scheduler share between workers: pub/sub, sliding-window success/fail counters, sets and
+    leader locks. Here all of it lives in this process, and handlers run inside `publish`.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.counters: Dict[str, RollingCounter] = {}
+        self.sets: Dict[str, Set[str]] = defaultdict(set)
+
+    def publish(self, topic: str, key: str, message: str) -> None:
+        for handler in list(self.handlers.get(topic, ())):
+            handler(key, message)
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        with self.lock:
+            self.handlers[topic].append(handler)
+
+    def record(self, name: str, window: int, failed: bool) -> None:
+        with self.lock:
+            counter = self.counters.get(name)
+            if counter is None:
+                counter = self.counters[name] = RollingCounter(window)
+            counter.record(failed)
+
+    def totals(self, name: str, window: int) -> Dict[str, int]:
+        with self.lock:
+            counter = self.counters.get(name)
+            return counter.totals() if counter is not None else {"success": 0, "fail": 0}
+
+    def add_member(self, name: str, member: str) -> bool:
+        """Add `member` to the set `name`; returns whether it wasn't there yet."""
+        with self.lock:
+            if member in self.sets[name]:
+                return False
+            self.sets[name].add(member)
+            return True
+
+    def remove_member(self, name: str, member: str) -> bool:
+        """Remove `member` from the set `name`; returns whether it was there."""
+        with self.lock:
+            if member not in self.sets[name]:
+                return False
+            self.sets[name].discard(member)
+            return True
+
+    def members(self, name: str) -> Set[str]:
+        with self.lock:
+            return set(self.sets.get(name, ()))
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        """Try to become the only holder of `name` for `ttl` seconds."""
+        return True
+
+
+class RedisCoordinator:
+    """
+    Coordination layer shared by all workers through Redis.
+
+    Counters are kept in buckets of window / 60 seconds (at least one) that expire on their own,
+    so a window is accurate to one bucket and reading it is a single pipelined round trip.
+    Subscriptions are served by one listener thread per worker, started on the first subscribe.
+    """
+
+    shared = True
+    buckets_per_window = 60
+
+    def __init__(self, url: str, prefix: str = "byne"):
+        # Only needed when COORDINATION_URL is set
+        import redis
+
+        # Bounded timeouts: an unreachable backend must fail calls, not hang the threads making them
+        self.redis = redis.Redis.from_url(url, decode_responses=True, socket_timeout=2, socket_connect_timeout=2)
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.pubsub = None
+        self.token = uuid.uuid4().hex
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def publish(self, topic: str, key: str, message: str) -> None:
+        self.redis.publish(self._key("topic", topic, key), message)
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        with self.lock:
+            self.handlers[topic].append(handler)
+            if self.pubsub is None:
+                self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                self.pubsub.psubscribe(**{self._key("topic", "*"): self._dispatch})
+                self.pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._listener_failed)
+
+    def _dispatch(self, message) -> None:
+        # Channels are prefix:topic:<topic>:<key>; the key may itself contain colons
+        _, _, topic, key = message["channel"].split(":", 3)
+        for handler in list(self.handlers.get(topic, ())):
+            try:
+                handler(key, message["data"])
+            except Exception:
+                logger.exception("Handler for %s failed", message["channel"])
+
+    @staticmethod
+    def _listener_failed(exception, pubsub, thread) -> None:
+        # Keep the listener thread alive: redis-py reconnects and resubscribes on the next read
+        logger.warning("Coordination listener error: %s", exception)
+        time.sleep(1)
+
+    def _buckets(self, window: int) -> Tuple[int, int]:
+        width = max(1, math.ceil(window / self.buckets_per_window))
+        return width, int(time.time() // width)
+
+    def record(self, name: str, window: int, failed: bool) -> None:
+        width, bucket = self._buckets(window)
+        key = self._key("counter", name, str(bucket))
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(key, "fail" if failed else "success", 1)
+        pipe.expire(key, window + width)
+        pipe.execute()
+
+    def totals(self, name: str, window: int) -> Dict[str, int]:
+        width, bucket = self._buckets(window)
+        pipe = self.redis.pipeline(transaction=False)
+        for past in range(bucket - math.ceil(window / width) + 1, bucket + 1):
+            pipe.hgetall(self._key("counter", name, str(past)))
+        totals = {"success": 0, "fail": 0}
+        for counts in pipe.execute():
+            for field in totals:
+                totals[field] += int(counts.get(field, 0))
+        return totals
+
+    def add_member(self, name: str, member: str) -> bool:
+        return self.redis.sadd(self._key("set", name), member) == 1
+
+    def remove_member(self, name: str, member: str) -> bool:
+        return self.redis.srem(self._key("set", name), member) == 1
+
+    def members(self, name: str) -> Set[str]:
+        return set(self.redis.smembers(self._key("set", name)))
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        return bool(self.redis.set(self._key("lock", name), self.token, nx=True, px=max(1, int(ttl * 1000))))
+
+
+class Dispatcher:
+    """
+    Runs the coordination calls of the ingestion endpoint without letting them slow it down or fail it.
+
+    With a shared coordinator every call costs round trips to the backend, and a report that was
+    stored must be acknowledged even while the backend is down, so calls are queued to a single
+    daemon thread. A call that fails, or that finds the queue full, is logged and dropped; the
+    log is limited to one line per `log_interval` seconds. The in-process coordinator is cheap
+    and can't be unreachable, so it is called inline.
+    """
+
+    def __init__(self, coordinator, max_pending: int = 10000, log_interval: float = 10):
+        self.inline = not coordinator.shared
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.log_interval = log_interval
+        self.lock = threading.Lock()
+        self.thread = None
+        self.dropped = 0
+        self.next_log = 0.0
+
+    def submit(self, function: Callable, *args) -> None:
+        if self.inline:
+            self._call(function, args)
+            return
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="coordination", daemon=True)
+                    self.thread.start()
+        try:
+            self.queue.put_nowait((function, args))
+        except queue.Full:
+            self._dropped(function, "the queue is full")
+
+    def _run(self) -> None:
+        while True:
+            function, args = self.queue.get()
+            self._call(function, args)
+
+    def _call(self, function: Callable, args: tuple) -> None:
+        try:
+            function(*args)
+        except Exception as e:
+            self._dropped(function, e)
+
+    def _dropped(self, function: Callable, reason) -> None:
+        with self.lock:
+            self.dropped += 1
+            now = time.monotonic()
+            if now < self.next_log:
+                return
+            self.next_log = now + self.log_interval
+            dropped, self.dropped = self.dropped, 0
+        logger.warning("Dropped %d coordination call(s), last %s: %s", dropped, function.__qualname__, reason)
+
+
+def create_coordinator(url: str):
+    return RedisCoordinator(url) if url else LocalCoordinator()
+
+
+coordinator = create_coordinator(settings.COORDINATION_URL)
+dispatcher = Dispatcher(coordinator)
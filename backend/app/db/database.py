@@ -8,10 +8,25 @@ def correct_postgres_url(url):
         url = 'postgresql://' + url[len('postgres://'):]
     return url
 
+def pool_options(url):
+    """
+    Size each worker's pool so that all workers together stay within DB_CONNECTION_BUDGET.
+
+    Overflow connections are disabled: they are what lets N workers exceed the budget under load.
+    SQLite keeps SQLAlchemy's defaults.
+    """
+    if url.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': max(1, settings.DB_CONNECTION_BUDGET // max(1, settings.WORKERS)),
+        'max_overflow': 0,
+        'pool_pre_ping': True,
+    }
+
 DB_URL = correct_postgres_url(settings.DATABASE_URL)
 
 # Create the SQLAlchemy engine
-engine = create_engine(DB_URL)
+engine = create_engine(DB_URL, **pool_options(DB_URL))
 
 # Create a SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
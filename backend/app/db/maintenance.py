@@ -0,0 +1,268 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, update, func, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from .database import SessionLocal
+from .models import Model, ModelUser, Report, Job
+from ..config import settings
+from .. import archive
+from ..environments import environments
+from ..activity import model_users_insert, widen_on_conflict
+
+
+def delete_reports_in_batches(db: Session, *criteria, batch_size: int = None) -> int:
+    """
+    Delete the reports matching `criteria` with set-based DELETE statements of at most
+    `batch_size` rows, committing after each batch so no lock is held for long.
+
+    Returns:
+    - int: The total number of deleted reports
+    """
+    batch_size = batch_size or settings.DELETE_BATCH_SIZE
+    total = 0
+    while True:
+        ids = select(Report.id).where(*criteria).limit(batch_size).scalar_subquery()
+        result = db.execute(
+            delete(Report).where(Report.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+def backfill_model_users(engine: Engine) -> int:
+    """
+    Fill model_users from the existing reports with one aggregate INSERT ... SELECT per model.
+
+    Rows that ingestion has written meanwhile are widened rather than replaced, so this can
+    run while the API is serving, and again without harm.
+
+    Returns:
+    - int: The number of (model, machine) rows inserted or widened
+    """
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        model_ids = conn.execute(select(Model.id).order_by(Model.id)).scalars().all()
+    total = 0
+    for model_id in model_ids:
+        history = select(
+            Report.model_id, Report.machine_id, func.min(Report.timestamp), func.max(Report.timestamp)
+        ).where(Report.model_id == model_id, Report.machine_id.isnot(None)) \
+            .group_by(Report.model_id, Report.machine_id)
+        statement = model_users_insert(dialect).from_select(
+            ["model_id", "machine_id", "first_seen", "last_seen"], history
+        )
+        with engine.begin() as conn:
+            total += conn.execute(widen_on_conflict(statement, dialect)).rowcount
+    return total
+
+
+def _latest_environments(db: Session, keys, before_id: int) -> dict:
+    """
+    The environment of the newest report before `before_id` that has one, for each
+    (model_id, machine_id) in `keys`.
+    """
+    if not keys:
+        return {}
+    latest = (
+        select(func.max(Report.id).label("id"))
+        .where(Report.id < before_id, Report.environment_id.isnot(None),
+               tuple_(Report.model_id, Report.machine_id).in_(list(keys)))
+        .group_by(Report.model_id, Report.machine_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(Report.model_id, Report.machine_id, Report.environment_id).join(latest, Report.id == latest.c.id)
+    )
+    return {(row.model_id, row.machine_id): row.environment_id for row in rows}
+
+
+def backfill_environments(db: Session, batch_size: int = None) -> int:
+    """
+    Attribute the reports stored without an environment, such as those ingested before the
+    environments table existed, with the rule ingestion applies.
+
+    Reports are walked in id order, `batch_size` at a time, each batch committed on its own.
+    A report with env_info gets its own environment; one without inherits the last environment
+    its machine reported for the model, and stays unattributed if there is none yet. What the
+    earlier batches attributed is read back from the table rather than kept in memory, so only
+    the machines of the current batch are tracked.
+
+    Returns:
+    - int: The number of reports attributed
+    """
+    batch_size = batch_size or settings.DELETE_BATCH_SIZE
+    last_id = attributed = 0
+    while True:
+        rows = db.execute(
+            select(Report.id, Report.model_id, Report.machine_id, Report.env_info)
+            .where(Report.id > last_id, Report.environment_id.is_(None))
+            .order_by(Report.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return attributed
+        last_environment = _latest_environments(
+            db, {(row.model_id, row.machine_id) for row in rows if not row.env_info}, rows[0].id)
+        ids_by_environment = defaultdict(list)
+        for row in rows:
+            key = (row.model_id, row.machine_id)
+            if row.env_info:
+                last_environment[key] = environments.environment_id(db, row.env_info)
+            if key in last_environment:
+                ids_by_environment[last_environment[key]].append(row.id)
+        for environment_id, ids in ids_by_environment.items():
+            attributed += db.execute(
+                update(Report).where(Report.id.in_(ids)).values(environment_id=environment_id)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        db.commit()
+        last_id = rows[-1].id
+
+
+def run_environment_backfill(job_id: int) -> None:
+    """
+    Background job: attribute the reports stored without an environment.
+    """
+    _run_job(job_id, backfill_environments)
+
+
+def create_job(db: Session, kind: str, target: str = None) -> Job:
+    job = Job(kind=kind, target=target, status="pending", deleted_count=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _run_job(job_id: int, work) -> None:
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        job.status = "running"
+        db.commit()
+        try:
+            job.deleted_count = work(db)
+            job.status = "completed"
+        except Exception as e:
+            db.rollback()
+            job = db.get(Job, job_id)
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = func.now()
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_model_deletion(job_id: int, model_id: int) -> None:
+    """
+    Background job: delete every report of a model in bounded batches, then the model itself.
+    """
+    def work(db: Session) -> int:
+        deleted = delete_reports_in_batches(db, Report.model_id == model_id)
+        # Catch reports ingested while the batches were running, then drop the model row
+        # in the same transaction so no new report can reference it.
+        deleted += db.execute(
+            delete(Report).where(Report.model_id == model_id).execution_options(synchronize_session=False)
+        ).rowcount
+        db.execute(delete(ModelUser).where(ModelUser.model_id == model_id).execution_options(synchronize_session=False))
+        db.execute(delete(Model).where(Model.id == model_id).execution_options(synchronize_session=False))
+        db.commit()
+        archive.drop_model(model_id)
+        return deleted
+
+    _run_job(job_id, work)
+
+    # A failed deletion leaves the model in place: make it visible and writable again
+    db = SessionLocal()
+    try:
+        db.execute(update(Model).where(Model.id == model_id, Model.deletion_job_id == job_id)
+                   .values(deletion_job_id=None).execution_options(synchronize_session=False))
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_retention_purge(job_id: int, older_than_days: int) -> None:
+    """
+    Background job: delete the reports older than `older_than_days` days in bounded batches,
+    and the archived months that ended before the cutoff.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    def work(db: Session) -> int:
+        deleted = delete_reports_in_batches(db, Report.timestamp < cutoff)
+        archive.drop_months_before(cutoff)
+        return deleted
+
+    _run_job(job_id, work)
+
+
+def archive_month(db: Session, model_id: int, month: datetime) -> int:
+    """
+    Move one model's month of reports to the archive, ARCHIVE_FILE_ROWS reports per Parquet file.
+
+    Each file is written before its reports are deleted from the hot table, in id order, so an
+    interruption at any point loses nothing.
+
+    Returns:
+    - int: The number of reports moved
+    """
+    criteria = (Report.model_id == model_id, Report.timestamp >= month, Report.timestamp < archive.next_month(month))
+    columns = [getattr(Report, name) for name in archive.COLUMNS]
+    moved = 0
+    while True:
+        rows = db.execute(
+            select(*columns).where(*criteria).order_by(Report.id).limit(settings.ARCHIVE_FILE_ROWS)
+        ).all()
+        if not rows:
+            return moved
+        archive.write_part(model_id, month, rows)
+        # Exactly the ids written: a report committed late with an id inside the chunk's range
+        # isn't in the file, and is left for the next chunk
+        ids = [row.id for row in rows]
+        for start in range(0, len(ids), settings.DELETE_BATCH_SIZE):
+            moved += db.execute(
+                delete(Report).where(Report.id.in_(ids[start:start + settings.DELETE_BATCH_SIZE]))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        db.commit()
+
+
+def archive_reports(db: Session) -> int:
+    """
+    Move every closed month older than ARCHIVE_AFTER_DAYS days from the reports table to the archive.
+
+    Returns:
+    - int: The number of reports moved
+    """
+    cutoff = archive.month_start(datetime.utcnow() - timedelta(days=settings.ARCHIVE_AFTER_DAYS))
+    oldest_reports = db.query(Report.model_id, func.min(Report.timestamp)) \
+        .filter(Report.timestamp < cutoff) \
+        .group_by(Report.model_id) \
+        .all()
+    moved = 0
+    for model_id, oldest in oldest_reports:
+        month = archive.month_start(oldest)
+        while month < cutoff:
+            moved += archive_month(db, model_id, month)
+            month = archive.next_month(month)
+    return moved
+
+
+def run_archive(job_id: int) -> None:
+    """
+    Background job: move the closed months older than ARCHIVE_AFTER_DAYS days to the archive.
+    """
+    _run_job(job_id, archive_reports)
+
+
+def run_scheduled_archive() -> None:
+    db = SessionLocal()
+    try:
+        job = create_job(db, "archive_reports")
+    finally:
+        db.close()
+    run_archive(job.id)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -19,6 +19,8 @@ class Model(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set while a deletion job runs: the model is hidden and refuses new reports
+    deletion_job_id = Column(Integer, ForeignKey("jobs.id"), nullable=True)
     reports = relationship("Report", back_populates="model", cascade="all, delete-orphan")
 
 class Report(Base):
@@ -33,9 +35,71 @@ class Report(Base):
     traceback = Column(String, nullable=True)
     env_info = Column(JSON, nullable=True)
     model_id = Column(Integer, ForeignKey("models.id"))
+    environment_id = Column(Integer, ForeignKey("environments.id"), nullable=True, index=True)
     model = relationship("Model", back_populates="reports")
+    environment = relationship("Environment")
+
+    __table_args__ = (
+        Index("ix_reports_model_id_timestamp", "model_id", "timestamp"),
+        Index("ix_reports_timestamp", "timestamp"),
+        # Trigram indexes back the substring search of read_reports (pg_trgm, Postgres only)
+        *(
+            Index(f"ix_reports_{column}_trgm", column, postgresql_using="gin",
+                  postgresql_ops={column: "gin_trgm_ops"}).ddl_if(dialect="postgresql")
+            for column in ("error", "traceback", "method")
+        ),
+    )
 
     def __init__(self, **kwargs):
         super(Report, self).__init__(**kwargs)
         if self.timestamp is None:
-            self.timestamp = func.now()
\ No newline at end of file
+            self.timestamp = func.now()
+
+class ModelUser(Base):
+    """First and last report time of each machine using a model, upserted at ingestion."""
+    __tablename__ = "model_users"
+
+    model_id = Column(Integer, ForeignKey("models.id"), primary_key=True)
+    machine_id = Column(String, primary_key=True)
+    first_seen = Column(DateTime(timezone=True))
+    last_seen = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_model_users_model_id_first_seen", "model_id", "first_seen"),
+        Index("ix_model_users_model_id_last_seen", "model_id", "last_seen"),
+    )
+
+class Environment(Base):
+    """One distinct combination of the env_info facets reports are broken down by."""
+    __tablename__ = "environments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(64), unique=True, index=True)
+    os_system = Column(String, nullable=True, index=True)
+    os_release = Column(String, nullable=True, index=True)
+    python_version = Column(String, nullable=True, index=True)
+    cuda_available = Column(Boolean, nullable=True, index=True)
+    cuda_version = Column(String, nullable=True, index=True)
+    gpu_type = Column(String, nullable=True, index=True)
+    torch_version = Column(String, nullable=True, index=True)
+    transformers_version = Column(String, nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String)
+    target = Column(String, nullable=True)
+    status = Column(String, default="pending")
+    deleted_count = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+class SchemaMigration(Base):
+    """A data migration of app.migrate that has been applied."""
+    __tablename__ = "schema_migrations"
+
+    name = Column(String, primary_key=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,177 @@
+import logging
+from typing import List
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+from .database import Base
+from . import models  # noqa: F401 (registers the tables on Base.metadata)
+from .maintenance import backfill_model_users
+
+logger = logging.getLogger("app.schema")
+
+# Data migrations applied by app.migrate, in order; each runs once and is recorded in schema_migrations
+DATA_MIGRATIONS = [
+    ("backfill_model_users", backfill_model_users),
+]
+
+
+def create_index(engine: Engine, index) -> None:
+    """
+    Create an index if it doesn't exist yet, skipping it on dialects it isn't meant for.
+
+    create_all only creates the indexes of new tables, so this is how an index added to an existing
+    table gets built. On Postgres it is built CONCURRENTLY so ingestion isn't blocked meanwhile.
+    """
+    if engine.dialect.name != "postgresql":
+        with engine.begin() as conn:
+            index.create(conn, checkfirst=True)
+        return
+
+    options = index.dialect_options["postgresql"]
+    options["concurrently"] = True
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            index.create(conn, checkfirst=True)
+    finally:
+        options["concurrently"] = False
+
+
+def add_missing_columns(engine: Engine) -> None:
+    """
+    Add the nullable columns declared on a model but missing from its existing table.
+
+    create_all never alters existing tables. Columns are added without a default, so this is a
+    catalog-only change on Postgres; existing rows read the new column as NULL.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                definition = str(CreateColumn(column).compile(dialect=engine.dialect))
+                for foreign_key in column.foreign_keys:
+                    referenced = foreign_key.column
+                    definition += f" REFERENCES {referenced.table.name} ({referenced.name})"
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+
+
+# Arbitrary key of the Postgres advisory lock held during schema changes
+SCHEMA_LOCK_ID = 0x62796E65
+
+
+def _locked(engine: Engine, setup) -> None:
+    """
+    Run `setup` holding a Postgres advisory lock, so instances starting or migrating together
+    change the schema one after the other instead of racing on the same DDL.
+    """
+    if engine.dialect.name != "postgresql":
+        setup(engine)
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": SCHEMA_LOCK_ID})
+        try:
+            setup(engine)
+        finally:
+            lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCHEMA_LOCK_ID})
+
+
+def _expected_indexes(engine: Engine):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            ddl_if = getattr(index, "_ddl_if", None)
+            if ddl_if is None or ddl_if.dialect in (None, engine.dialect.name):
+                yield table, index
+
+
+def invalid_indexes(engine: Engine) -> List[str]:
+    """The indexes Postgres has marked INVALID, such as one whose concurrent build was interrupted."""
+    if engine.dialect.name != "postgresql":
+        return []
+    with engine.connect() as conn:
+        return list(conn.execute(text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+        )).scalars())
+
+
+def pending_migrations(engine: Engine) -> List[str]:
+    """The indexes to build or rebuild and the data migrations still to apply, cheapest checks only."""
+    inspector = inspect(engine)
+    existing = {}
+    pending = []
+    invalid = set(invalid_indexes(engine))
+    for table, index in _expected_indexes(engine):
+        if table.name not in existing:
+            existing[table.name] = {found["name"] for found in inspector.get_indexes(table.name)}
+        if index.name not in existing[table.name] or index.name in invalid:
+            pending.append(f"index {index.name}")
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(models.SchemaMigration.name)).scalars())
+    pending.extend(name for name, _ in DATA_MIGRATIONS if name not in applied)
+    return pending
+
+
+def ensure_schema(engine: Engine) -> None:
+    """
+    Create the missing extensions and tables, and add the nullable columns missing from existing ones.
+
+    This is what runs at startup, so it only does what is quick whatever the size of the data:
+    new tables are empty and added columns are catalog-only changes. Indexes on existing tables
+    and data backfills are left to `migrate`, and a warning lists them while they are pending.
+    """
+    _locked(engine, _ensure_schema)
+    pending = pending_migrations(engine)
+    if pending:
+        logger.warning("Schema migrations pending, run `python -m app.migrate`: %s", ", ".join(pending))
+
+
+def _ensure_schema(engine: Engine) -> None:
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        had_tables = set(inspect(conn).get_table_names())
+        Base.metadata.create_all(bind=conn)
+        # An empty database needs no backfill
+        if not had_tables:
+            conn.execute(models.SchemaMigration.__table__.insert(), [{"name": name} for name, _ in DATA_MIGRATIONS])
+
+    add_missing_columns(engine)
+
+
+def build_indexes(engine: Engine) -> None:
+    """
+    Build every declared index that is missing, and rebuild the ones left INVALID.
+
+    A killed CREATE INDEX CONCURRENTLY leaves an INVALID index behind that the planner ignores,
+    but that still satisfies `checkfirst`; it is dropped first so it gets built again.
+    """
+    invalid = set(invalid_indexes(engine))
+    for _, index in _expected_indexes(engine):
+        if index.name in invalid:
+            logger.warning("Rebuilding invalid index %s", index.name)
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+        create_index(engine, index)
+
+
+def migrate(engine: Engine) -> None:
+    """
+    Bring the schema fully up to date: what `ensure_schema` does, then the indexes and the
+    pending data migrations. These can take long on a large database; run them as a release
+    step or maintenance job rather than at startup. The API can keep serving meanwhile.
+    """
+    def run(engine: Engine) -> None:
+        _ensure_schema(engine)
+        build_indexes(engine)
+        with engine.connect() as conn:
+            applied = set(conn.execute(select(models.SchemaMigration.name)).scalars())
+        for name, migration in DATA_MIGRATIONS:
+            if name in applied:
+                continue
+            logger.info("Applying %s", name)
+            migration(engine)
+            with engine.begin() as conn:
+                conn.execute(models.SchemaMigration.__table__.insert(), {"name": name})
+
+    _locked(engine, run)
@@ -0,0 +1,162 @@
+import ast
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .config import settings
+from .db.models import Environment, Report
+
+def _package_version(packages, name: str) -> Optional[str]:
+    prefix = f"{name}=="
+    for package in packages or []:
+        if isinstance(package, str) and package.lower().startswith(prefix):
+            return package[len(prefix):]
+    return None
+
+
+def _gpu_types(gpu_info) -> Optional[str]:
+    # The tracking code appends str() of dicts such as "{'type': 'MPS'}" to gpu_info
+    types = set()
+    for gpu in gpu_info or []:
+        if isinstance(gpu, str):
+            try:
+                gpu = ast.literal_eval(gpu)
+            except (ValueError, SyntaxError):
+                continue
+        if isinstance(gpu, dict) and gpu.get("type"):
+            types.add(str(gpu["type"]))
+    return ",".join(sorted(types)) or None
+
+
+def extract_facets(env_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Pull the facets reports are broken down by out of an env_info blob, tolerating missing keys.
+    """
+    def section(name):
+        value = env_info.get(name)
+        return value if isinstance(value, dict) else {}
+
+    os_info, python_info, cuda_info = section("os_info"), section("python_info"), section("cuda_info")
+    python_version = python_info.get("version")
+    return {
+        "os_system": os_info.get("system") or None,
+        "os_release": os_info.get("release") or None,
+        # sys.version also carries the build date and compiler
+        "python_version": python_version.split()[0] if isinstance(python_version, str) and python_version else None,
+        "cuda_available": cuda_info["available"] if isinstance(cuda_info.get("available"), bool) else None,
+        "cuda_version": cuda_info.get("version") or None,
+        "gpu_type": _gpu_types(env_info.get("gpu_info")),
+        "torch_version": _package_version(env_info.get("installed_packages"), "torch"),
+        "transformers_version": _package_version(env_info.get("installed_packages"), "transformers"),
+    }
+
+
+def fingerprint(facets: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(facets, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.items = OrderedDict()
+
+    def get(self, key, default=None):
+        if key not in self.items:
+            return default
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.items
+
+    def set(self, key, value) -> None:
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def discard(self, key) -> None:
+        self.items.pop(key, None)
+
+
+class EnvironmentResolver:
+    """
+    Maps reports to rows of the environments dimension table at ingestion time.
+
+    Only failure reports carry env_info, so a report without one is attributed to the last
+    environment its machine reported for the model within ENVIRONMENT_LOOKBACK_DAYS. Both
+    lookups are cached, so a steady stream of reports from known machines costs no extra queries.
+    A machine with no environment yet is only remembered for ENVIRONMENT_MISS_TTL seconds: its
+    environment may be reported to another worker in the meantime.
+    """
+
+    def __init__(self, max_size: int):
+        self.lock = threading.Lock()
+        self.environments = LRUCache(max_size)
+        self.machines = LRUCache(max_size)
+        # (model, machine) -> monotonic time until which it is known to have no environment
+        self.misses = LRUCache(max_size)
+
+    def resolve(self, db: Session, model_id: int, machine_id: str, env_info: Optional[Dict]) -> Optional[int]:
+        key = (model_id, machine_id)
+        if not env_info:
+            now = time.monotonic()
+            with self.lock:
+                if key in self.machines:
+                    return self.machines.get(key)
+                if self.misses.get(key, 0) > now:
+                    return None
+            # Bounded by time so a cache miss never scans a machine's whole history
+            since = datetime.utcnow() - timedelta(days=settings.ENVIRONMENT_LOOKBACK_DAYS)
+            environment_id = db.query(Report.environment_id).filter(
+                Report.model_id == model_id,
+                Report.machine_id == machine_id,
+                Report.timestamp >= since,
+                Report.environment_id.isnot(None),
+            ).order_by(Report.id.desc()).limit(1).scalar()
+            if environment_id is None:
+                with self.lock:
+                    self.misses.set(key, now + settings.ENVIRONMENT_MISS_TTL)
+                return None
+        else:
+            environment_id = self.environment_id(db, env_info)
+        with self.lock:
+            self.machines.set(key, environment_id)
+            self.misses.discard(key)
+        return environment_id
+
+    def environment_id(self, db: Session, env_info: Dict) -> int:
+        """The id of the environment described by `env_info`, created if it is new."""
+        facets = extract_facets(env_info)
+        digest = fingerprint(facets)
+        with self.lock:
+            environment_id = self.environments.get(digest)
+        if environment_id is None:
+            environment_id = self._get_or_create(db, digest, facets)
+            with self.lock:
+                self.environments.set(digest, environment_id)
+        return environment_id
+
+    @staticmethod
+    def _get_or_create(db: Session, digest: str, facets: Dict[str, Any]) -> int:
+        environment_id = db.query(Environment.id).filter(Environment.fingerprint == digest).scalar()
+        if environment_id is not None:
+            return environment_id
+        # Committed on its own so a cached id never points at a rolled back row
+        try:
+            environment = Environment(fingerprint=digest, **facets)
+            db.add(environment)
+            db.commit()
+            return environment.id
+        except IntegrityError:
+            # Another request created it concurrently
+            db.rollback()
+            return db.query(Environment.id).filter(Environment.fingerprint == digest).scalar()
+
+
+environments = EnvironmentResolver(settings.ENVIRONMENT_CACHE_SIZE)
@@ -1,12 +1,17 @@
+import asyncio
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from .db.database import engine, get_db
-from .db import models
-from .api import auth, model_routes, reports
+from .db.schema import ensure_schema
+from .db.maintenance import run_scheduled_archive
+from .api import auth, model_routes, reports, jobs
 from .config import settings
+from .coordination import coordinator
+from . import metrics, archive
 
-models.Base.metadata.create_all(bind=engine)
+metrics.instrument_engine(engine)
 
 app = FastAPI(title="Model Reporting API")
 
@@ -19,11 +24,32 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.PrometheusMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(model_routes.router, prefix="/models", tags=["Models"])
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(metrics.router, tags=["Monitoring"])
+
+
+@app.on_event("startup")
+def setup_schema():
+    # app.server runs it once before starting the workers and turns this off
+    if settings.SCHEMA_SETUP:
+        ensure_schema(engine)
+
+
+@app.on_event("startup")
+async def schedule_archive():
+    if archive.enabled() and settings.ARCHIVE_INTERVAL_HOURS > 0:
+        asyncio.create_task(archive.archive_periodically(run_scheduled_archive, coordinator))
+
+
+@app.on_event("shutdown")
+def shutdown_metrics():
+    metrics.mark_process_dead()
 
 
 @app.get("/")
@@ -35,16 +61,11 @@ def read_root():
 def health_check(db: Session = Depends(get_db)):
     try:
         # Try to make a simple query to check database connection
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "main:app",
-        host=settings.BACKEND_HOST,
-        port=settings.BACKEND_PORT,
-        reload=True
-    )
\ No newline at end of file
+    from .server import main
+    main()
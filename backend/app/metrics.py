@@ -0,0 +1,194 @@
+import logging
+import os
+import time
+from fastapi import APIRouter, Response
+from prometheus_client import (Counter, Gauge, Histogram, CollectorRegistry, CONTENT_TYPE_LATEST, generate_latest,
+                               multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+logger = logging.getLogger("app.slow_query")
+
+router = APIRouter()
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+REPORTS_INGESTED = Counter(
+    "reports_ingested_total",
+    "Reports stored by the ingestion endpoint",
+    ["model"],
+)
+REPORTS_REJECTED = Counter(
+    "reports_rejected_total",
+    "Reports refused by the ingestion endpoint",
+    ["model", "reason"],
+)
+DB_STATEMENT_LATENCY = Histogram(
+    "db_statement_duration_seconds",
+    "Database statement execution time by operation",
+    ["operation"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Database connections opened beyond the pool size",
+    multiprocess_mode="livesum",
+)
+
+INGEST_ROUTE = "/reports/{model_name}/report"
+UNKNOWN_MODEL = "_unknown"
+
+# Models the ingestion endpoint has stored reports for. Rejections for any other name are
+# labelled UNKNOWN_MODEL: the name comes from an unauthenticated caller, and labelling it as
+# is would let anyone create an unbounded number of series.
+INGESTED_MODELS = set()
+
+
+def model_label(model_name: str) -> str:
+    return model_name if model_name in INGESTED_MODELS else UNKNOWN_MODEL
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency and in-flight requests.
+
+    Latency is labelled with the matched route template rather than the raw path so
+    model names and report ids don't explode the label cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route_path, str(status_code)).observe(
+                time.perf_counter() - start
+            )
+            if route_path == INGEST_ROUTE and status_code == 422:
+                REPORTS_REJECTED.labels(model_label(scope["path_params"]["model_name"]), "invalid").inc()
+
+
+def _parameters_shape(parameters):
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _explain(conn, cursor, statement, parameters):
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(column) for column in row) for row in explain_cursor.fetchall())
+    finally:
+        explain_cursor.close()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Attach per-statement timing, the slow-query log and pool gauges to an engine.
+
+    The pool gauges are updated from pool events rather than read on scrape, so that in
+    multi-worker mode each worker writes its own value and /metrics reports their sum.
+    """
+    def overflow():
+        return max(getattr(engine.pool, "overflow", lambda: 0)(), 0)
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+        DB_POOL_OVERFLOW.set(overflow())
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+        DB_POOL_OVERFLOW.set(overflow())
+
+    # The start time is kept on the execution context, which is discarded with the statement:
+    # after_cursor_execute doesn't run for a statement that raised, so nothing may outlive it.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_STATEMENT_LATENCY.labels(operation).observe(elapsed)
+
+        if settings.SLOW_QUERY_MS <= 0 or elapsed * 1000 < settings.SLOW_QUERY_MS:
+            return
+
+        shape = ([_parameters_shape(p) for p in parameters[:1]] + [f"... x{len(parameters)}"]
+                 if executemany else _parameters_shape(parameters))
+        plan = None
+        # Only plain SELECTs are explained: EXPLAIN never fails on a statement that just
+        # succeeded, so it can't poison the surrounding transaction.
+        if settings.SLOW_QUERY_EXPLAIN and not executemany and operation == "SELECT":
+            try:
+                plan = _explain(conn, cursor, statement, parameters)
+            except Exception as e:
+                plan = f"EXPLAIN failed: {e}"
+        logger.warning(
+            "Slow query (%.1f ms): %s | parameters: %s | plan:\n%s",
+            elapsed * 1000, statement, shape, plan,
+        )
+
+
+def multiprocess_enabled() -> bool:
+    """Whether metrics are aggregated across workers (see app.server)."""
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the aggregate once it exits."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+@router.get("/metrics")
+def metrics():
+    if not multiprocess_enabled():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,39 @@
+"""
+Bring the database schema fully up to date:
+
+    python -m app.migrate
+
+Startup only creates what is quick (new tables, nullable columns). This also builds the indexes
+missing from existing tables, CONCURRENTLY on Postgres, rebuilds any left INVALID by an
+interrupted build, and applies the pending data backfills. On a large database this can take
+a while, so it runs as a release step (see heroku.yml) while the previous release keeps serving.
+It is safe to run again, and to interrupt.
+"""
+import argparse
+import logging
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from .db.database import DB_URL
+from .db.schema import migrate, pending_migrations
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Apply the pending schema migrations.")
+    parser.add_argument("--check", action="store_true", help="Only list the pending migrations; exit 1 if any")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    engine = create_engine(DB_URL, poolclass=NullPool)
+    try:
+        if args.check:
+            pending = pending_migrations(engine)
+            for name in pending:
+                print(name)
+            raise SystemExit(1 if pending else 0)
+        migrate(engine)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
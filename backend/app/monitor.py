@@ -0,0 +1,150 @@
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Tuple
+from urllib import request
+from .config import settings
+from .schemas.monitor import AlertRule
+from .coordination import coordinator
+
+logger = logging.getLogger("app.monitor")
+
+
+class WebhookSender:
+    """
+    Delivers alert payloads from a single daemon thread so ingestion never waits on a webhook.
+    """
+
+    def __init__(self, max_pending: int = 1000, timeout: float = 5):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.timeout = timeout
+        self.thread = None
+
+    def send(self, url: str, payload: dict) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="alert-webhooks", daemon=True)
+            self.thread.start()
+        try:
+            self.queue.put_nowait((url, payload))
+        except queue.Full:
+            logger.warning("Alert webhook queue is full, dropping alert for %s", url)
+
+    def _run(self) -> None:
+        while True:
+            url, payload = self.queue.get()
+            try:
+                data = json.dumps(payload).encode("utf-8")
+                req = request.Request(url, data=data, headers={"Content-Type": "application/json"}, method="POST")
+                with request.urlopen(req, timeout=self.timeout):
+                    pass
+            except Exception as e:
+                logger.warning("Alert webhook to %s failed: %s", url, e)
+
+
+class ErrorRateMonitor:
+    """
+    Sliding-window success/failure counters per (model, method) with threshold alerts.
+
+    Counters and the set of firing alerts live in the coordination layer, so every worker
+    evaluates the same numbers and a transition is claimed, and its webhook sent, by exactly
+    one of them. The rules that match a key are resolved once per worker and cached. Alerts
+    fire on state changes only: once when a rule trips and once when the error rate falls back
+    under its threshold. With a shared coordinator a key is re-evaluated at most every
+    `eval_interval` seconds per worker, since reading the window costs a round trip.
+    """
+
+    firing_set = "monitor:firing"
+
+    def __init__(self, window: int, rules: List[AlertRule], sender: WebhookSender, coordinator,
+                 eval_interval: float = 0):
+        self.window = window
+        self.rules = rules
+        self.sender = sender
+        self.coordinator = coordinator
+        self.eval_interval = eval_interval if coordinator.shared else 0
+        self.lock = threading.Lock()
+        self.key_rules: Dict[Tuple[str, str], List[AlertRule]] = {}
+        self.next_eval: Dict[Tuple[str, str], float] = {}
+
+    @staticmethod
+    def _counter(model_name: str, method: str) -> str:
+        return f"monitor:{model_name}:{method}"
+
+    @staticmethod
+    def _methods(model_name: str) -> str:
+        return f"monitor:methods:{model_name}"
+
+    @staticmethod
+    def _state(index: int, key: Tuple[str, str]) -> str:
+        return f"{index}|{key[0]}|{key[1]}"
+
+    def record(self, model_name: str, method: str, failed: bool) -> None:
+        key = (model_name, method)
+        self.coordinator.record(self._counter(*key), self.window, failed)
+        with self.lock:
+            rules = self.key_rules.get(key)
+            if rules is None:
+                rules = self.key_rules[key] = [rule for rule in self.rules if rule.matches(model_name, method)]
+                self.coordinator.add_member(self._methods(model_name), method)
+            if not rules:
+                return
+            now = time.monotonic()
+            if now < self.next_eval.get(key, 0):
+                return
+            self.next_eval[key] = now + self.eval_interval
+        totals = self.coordinator.totals(self._counter(*key), self.window)
+        alerts = [self._evaluate(index, rule, key, totals["success"], totals["fail"])
+                  for index, rule in enumerate(rules)]
+        for rule, payload in filter(None, alerts):
+            self.sender.send(rule.webhook_url, payload)
+
+    def _evaluate(self, index: int, rule: AlertRule, key: Tuple[str, str], success: int, fail: int):
+        total = success + fail
+        error_rate = fail / total if total else 0.0
+        tripped = total >= rule.min_requests and error_rate >= rule.threshold
+        state = self._state(index, key)
+        if tripped:
+            changed = self.coordinator.add_member(self.firing_set, state)
+        else:
+            changed = self.coordinator.remove_member(self.firing_set, state)
+        if not changed:
+            return None
+        return rule, {
+            "status": "firing" if tripped else "resolved",
+            "rule": rule.name,
+            "model": key[0],
+            "method": key[1],
+            "error_rate": round(error_rate, 4),
+            "success": success,
+            "fail": fail,
+            "threshold": rule.threshold,
+            "window_seconds": self.window,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def error_rates(self, model_name: str) -> List[dict]:
+        firing = self.coordinator.members(self.firing_set)
+        rates = []
+        for method in sorted(self.coordinator.members(self._methods(model_name))):
+            key = (model_name, method)
+            totals = self.coordinator.totals(self._counter(*key), self.window)
+            total = totals["success"] + totals["fail"]
+            rates.append({
+                "method": method,
+                **totals,
+                "error_rate": totals["fail"] / total if total else 0.0,
+                "window_seconds": self.window,
+                "firing": [rule.name for index, rule in enumerate(self.rules)
+                           if rule.matches(model_name, method) and self._state(index, key) in firing],
+            })
+        return rates
+
+
+def load_rules(raw: str) -> List[AlertRule]:
+    return [AlertRule(**rule) for rule in json.loads(raw or "[]")]
+
+
+monitor = ErrorRateMonitor(window=settings.ALERT_WINDOW, rules=load_rules(settings.ALERT_RULES), sender=WebhookSender(),
+                           coordinator=coordinator, eval_interval=settings.ALERT_EVAL_INTERVAL)
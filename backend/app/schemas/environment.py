@@ -0,0 +1,19 @@
+from enum import Enum
+from pydantic import BaseModel
+from typing import Optional
+
+class EnvironmentFacet(str, Enum):
+    os_system = "os_system"
+    os_release = "os_release"
+    python_version = "python_version"
+    cuda_available = "cuda_available"
+    cuda_version = "cuda_version"
+    gpu_type = "gpu_type"
+    torch_version = "torch_version"
+    transformers_version = "transformers_version"
+
+class FacetBreakdown(BaseModel):
+    value: Optional[str] = None
+    success: int
+    fail: int
+    error_rate: float
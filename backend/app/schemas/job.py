@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    target: Optional[str] = None
+    status: str
+    deleted_count: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
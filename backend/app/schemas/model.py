@@ -16,6 +16,16 @@ class MethodHistory(BaseModel):
     method: str
     history: List[DailyCount]
 
+class UserActivity(BaseModel):
+    new_users: int
+    returning_users: int
+    daily_new_users: List[DailyCount]
+
+class RetentionCohort(BaseModel):
+    cohort: str
+    size: int
+    retained: List[int]
+
 class ModelOut(ModelBase):
     id: int
     created_at: datetime
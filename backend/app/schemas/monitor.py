@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List
+
+class AlertRule(BaseModel):
+    name: str
+    webhook_url: str
+    threshold: float
+    model: str = "*"
+    method: str = "*"
+    min_requests: int = 20
+
+    def matches(self, model_name: str, method: str) -> bool:
+        return self.model in ("*", model_name) and self.method in ("*", method)
+
+class ErrorRate(BaseModel):
+    method: str
+    success: int
+    fail: int
+    error_rate: float
+    window_seconds: int
+    firing: List[str]
@@ -0,0 +1,21 @@
+from typing import Any, List
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    orjson-rendered response for endpoints that build plain dicts and lists from column tuples.
+
+    Returning it directly skips FastAPI's response_model validation and re-serialization, so
+    the route's response_model only documents the shape. UTC datetimes are written with a "Z"
+    suffix like pydantic does, so responses are unchanged byte for byte in content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def rows_to_dicts(rows, fields) -> List[dict]:
+    """Turn column tuples into dicts keyed by `fields`, without hydrating ORM or pydantic objects."""
+    return [dict(zip(fields, row)) for row in rows]
@@ -0,0 +1,78 @@
+"""
+Production entry point, serving the API from one or more worker processes:
+
+    python -m app.server --host 0.0.0.0 --port 8000 --workers 4
+
+The schema is set up once here, before any worker starts, and the workers skip it. Each
+worker's database pool gets DB_CONNECTION_BUDGET / WORKERS connections. With more than one
+worker, Prometheus metrics are aggregated through PROMETHEUS_MULTIPROC_DIR, and the live
+stream, error-rate alerts and archive scheduling need COORDINATION_URL to see every worker.
+"""
+import argparse
+import glob
+import logging
+import os
+import tempfile
+import uvicorn
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from .config import settings
+
+logger = logging.getLogger("app.server")
+
+
+def prepare_multiprocess_metrics() -> str:
+    """
+    Start every run without the metric files of the previous one, which would be summed in.
+
+    Only the `*.db` files prometheus_client writes are removed; the directory may be shared.
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "byne-metrics")
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def setup_schema() -> None:
+    # Imported here so the application engine is sized for the requested worker count
+    from .db.database import DB_URL
+    from .db.schema import ensure_schema
+
+    # A pool of one connection per worker can't hold the schema lock and run the setup at once
+    setup_engine = create_engine(DB_URL, poolclass=NullPool)
+    try:
+        ensure_schema(setup_engine)
+    finally:
+        setup_engine.dispose()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the Model Reporting API.")
+    parser.add_argument("--host", default=settings.BACKEND_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=settings.BACKEND_PORT, help="Port to bind")
+    parser.add_argument("--workers", type=int, default=settings.WORKERS, help="Worker processes (defaults to WORKERS)")
+    parser.add_argument("--log-level", default="info", help="Uvicorn log level")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    # Workers are spawned fresh and read their settings from the environment
+    settings.WORKERS = args.workers
+    os.environ["WORKERS"] = str(args.workers)
+    setup_schema()
+    settings.SCHEMA_SETUP = False
+    os.environ["SCHEMA_SETUP"] = "false"
+
+    if args.workers > 1:
+        prepare_multiprocess_metrics()
+        if not settings.COORDINATION_URL:
+            logger.warning("COORDINATION_URL is not set: live streams, alerts and archive scheduling "
+                           "will only see the reports of the worker that received them")
+
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
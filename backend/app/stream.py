@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Set
+from .config import settings
+from .coordination import coordinator
+from .schemas.report import ReportOut
+
+logger = logging.getLogger("app.stream")
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, model_name: str, failures_only: bool, buffer_size: int):
+        self.loop = loop
+        self.model_name = model_name
+        self.failures_only = failures_only
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def deliver(self, event: str) -> None:
+        # Runs on the event loop. A full buffer means the client can't keep up:
+        # drop its oldest event rather than grow without bound.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class ReportBroker:
+    """
+    Pub/sub fed by the ingestion endpoint, with rolling per-model counters.
+
+    Reports and counters go through the coordination layer, so a dashboard connected to one
+    worker sees the reports ingested by every worker. Delivery runs on the publishing thread
+    (or the coordinator's listener thread), so it is handed to each subscriber's event loop
+    with `call_soon_threadsafe`. With the in-process coordinator the report is only serialized
+    when somebody is listening for its model.
+    """
+
+    topic = "reports"
+
+    def __init__(self, window: int, buffer_size: int, coordinator):
+        self.window = window
+        self.buffer_size = buffer_size
+        self.coordinator = coordinator
+        self.lock = threading.Lock()
+        self.subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self.listening = False
+
+    def subscribe(self, model_name: str, failures_only: bool = False) -> Subscriber:
+        subscriber = Subscriber(asyncio.get_running_loop(), model_name, failures_only, self.buffer_size)
+        with self.lock:
+            self.subscribers[model_name].add(subscriber)
+            listen, self.listening = not self.listening, True
+        if listen:
+            try:
+                self.coordinator.subscribe(self.topic, self._deliver)
+            except Exception as e:
+                # The stream still serves stats; the next subscriber retries
+                logger.warning("Subscribing to %s failed: %s", self.topic, e)
+                with self.lock:
+                    self.listening = False
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self.lock:
+            subscribers = self.subscribers.get(subscriber.model_name)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers[subscriber.model_name]
+
+    def publish(self, model_name: str, report) -> None:
+        self.coordinator.record(f"stream:{model_name}", self.window, report.status != "success")
+        if not self.coordinator.shared and not self.subscribers.get(model_name):
+            return
+        self.coordinator.publish(self.topic, model_name, ReportOut.model_validate(report).model_dump_json())
+
+    def _deliver(self, model_name: str, message: str) -> None:
+        with self.lock:
+            subscribers = list(self.subscribers.get(model_name, ()))
+        if not subscribers:
+            return
+        report = json.loads(message)
+        failed = report["status"] != "success"
+        event = format_event("report", report)
+        for subscriber in subscribers:
+            if failed or not subscriber.failures_only:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+
+    def stats(self, model_name: str) -> Optional[Dict[str, int]]:
+        """The rolling counts of a model, or None while the coordinator can't be reached."""
+        try:
+            totals = self.coordinator.totals(f"stream:{model_name}", self.window)
+        except Exception as e:
+            logger.warning("Reading the stream stats of %s failed: %s", model_name, e)
+            return None
+        return {"window_seconds": self.window, **totals}
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+broker = ReportBroker(window=settings.STREAM_STATS_WINDOW, buffer_size=settings.STREAM_BUFFER_SIZE,
+                      coordinator=coordinator)
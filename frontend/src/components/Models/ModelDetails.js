@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getModel, updateModel, deleteModel, getUniqueUsers, getMethodHistory } from '../../services/api';
+import { getModel, updateModel, deleteModel, waitForJob, getUniqueUsers, getMethodHistory } from '../../services/api';
 import ReportBrowser from '../Reports/ReportBrowser';
 import {
   Container,
@@ -36,6 +36,7 @@ const ModelDetails = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [openDeleteDialog, setOpenDeleteDialog] = useState(false);
+  const [deleting, setDeleting] = useState(false);
   const [uniqueUsers, setUniqueUsers] = useState(0);
   const [methodHistory, setMethodHistory] = useState([]);
   const [startDate, setStartDate] = useState(new Date(new Date().setMonth(new Date().getMonth() - 1)));
@@ -77,11 +78,20 @@ const ModelDetails = () => {
   };
 
   const handleDelete = async () => {
+    setDeleting(true);
     try {
-      await deleteModel(name);
-      navigate('/models');
+      // Deletion runs as a background job: only leave once it has finished
+      const job = await waitForJob((await deleteModel(name)).id);
+      if (job.status === 'completed') {
+        navigate('/models');
+        return;
+      }
+      setError(`Failed to delete model: ${job.error}`);
     } catch (err) {
       setError('Failed to delete model');
+    } finally {
+      setDeleting(false);
+      setOpenDeleteDialog(false);
     }
   };
 
@@ -241,7 +251,7 @@ const ModelDetails = () => {
 
       <Dialog
         open={openDeleteDialog}
-        onClose={() => setOpenDeleteDialog(false)}
+        onClose={() => !deleting && setOpenDeleteDialog(false)}
         aria-labelledby="alert-dialog-title"
         aria-describedby="alert-dialog-description"
       >
@@ -252,11 +262,11 @@ const ModelDetails = () => {
           </DialogContentText>
         </DialogContent>
         <DialogActions>
-          <Button onClick={() => setOpenDeleteDialog(false)} color="primary">
+          <Button onClick={() => setOpenDeleteDialog(false)} color="primary" disabled={deleting}>
             Cancel
           </Button>
-          <Button onClick={handleDelete} color="error" autoFocus>
-            Delete
+          <Button onClick={handleDelete} color="error" autoFocus disabled={deleting}>
+            {deleting ? 'Deleting...' : 'Delete'}
           </Button>
         </DialogActions>
       </Dialog>
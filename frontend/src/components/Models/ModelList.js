@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../../context/AuthContext';
-import { getModels, deleteModel } from '../../services/api';
+import { getModels, deleteModel, waitForJob } from '../../services/api';
 import {
   Container,
   Typography,
@@ -31,6 +31,7 @@ const ModelList = () => {
   const [loading, setLoading] = useState(true);
   const [openDeleteDialog, setOpenDeleteDialog] = useState(false);
   const [modelToDelete, setModelToDelete] = useState(null);
+  const [deleting, setDeleting] = useState({});
   const { user, isAuthenticated } = useAuth();
   const navigate = useNavigate();
 
@@ -61,13 +62,22 @@ const ModelList = () => {
   };
 
   const handleDeleteConfirm = async () => {
+    const { name } = modelToDelete;
+    setOpenDeleteDialog(false);
+    setDeleting(current => ({ ...current, [name]: true }));
     try {
-      await deleteModel(modelToDelete.name);
-      setModels(models.filter(model => model.name !== modelToDelete.name));
-      setOpenDeleteDialog(false);
+      // Deletion runs as a background job: keep the model listed until it has finished
+      const job = await waitForJob((await deleteModel(name)).id);
+      if (job.status === 'completed') {
+        setModels(current => current.filter(model => model.name !== name));
+      } else {
+        setError(`Failed to delete model: ${job.error}`);
+      }
     } catch (err) {
       console.error('Failed to delete model:', err);
       setError('Failed to delete model');
+    } finally {
+      setDeleting(({ [name]: _, ...current }) => current);
     }
   };
 
@@ -121,18 +131,23 @@ const ModelList = () => {
                   <ListItemText
                     primary={model.name}
                     secondary={
-                      <Chip
-                        label={`Created: ${new Date(model.created_at).toLocaleDateString()}`}
-                        size="small"
-                        color="primary"
-                        variant="outlined"
-                      />
+                      deleting[model.name] ? (
+                        <Chip label="Deleting..." size="small" color="error" variant="outlined" />
+                      ) : (
+                        <Chip
+                          label={`Created: ${new Date(model.created_at).toLocaleDateString()}`}
+                          size="small"
+                          color="primary"
+                          variant="outlined"
+                        />
+                      )
                     }
                   />
                   <ListItemSecondaryAction>
                     <IconButton
                       edge="end"
                       aria-label="delete"
+                      disabled={!!deleting[model.name]}
                       onClick={(e) => {
                         e.stopPropagation();
                         handleDeleteClick(model);
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from 'react';
-import { getReports, deleteReport } from '../../services/api';
+import { getReports, deleteReport, subscribeToReports } from '../../services/api';
 import {
   Accordion,
   AccordionSummary,
@@ -24,20 +24,28 @@ import ExpandMoreIcon from '@mui/icons-material/ExpandMore';
 import FilterListIcon from '@mui/icons-material/FilterList';
 import DeleteIcon from '@mui/icons-material/Delete';
 
+// The server only searches for at least this many characters
+const MIN_SEARCH_LENGTH = 3;
+
 const ReportBrowser = ({ modelName }) => {
   const [reports, setReports] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [filter, setFilter] = useState('');
+  const [search, setSearch] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
   const [page, setPage] = useState(1);
   const [hasMore, setHasMore] = useState(true);
   const [limit] = useState(10);
+  const [liveStats, setLiveStats] = useState(null);
 
   const fetchReports = useCallback(async () => {
     try {
       setLoading(true);
-      const response = await getReports(modelName, page, limit);
+      const response = await getReports(modelName, page, limit, {
+        q: search,
+        status: statusFilter === 'all' ? undefined : statusFilter,
+      });
       // Assuming the response is an array of reports
       const newReports = Array.isArray(response) ? response : [];
       setReports(newReports);
@@ -50,12 +58,37 @@ const ReportBrowser = ({ modelName }) => {
     } finally {
       setLoading(false);
     }
-  }, [modelName, page, limit]);
+  }, [modelName, page, limit, search, statusFilter]);
 
   useEffect(() => {
     fetchReports();
   }, [fetchReports]);
 
+  useEffect(() => {
+    // Wait for the user to stop typing before searching
+    const timeout = setTimeout(() => {
+      const query = filter.trim();
+      setSearch(query.length >= MIN_SEARCH_LENGTH ? query : '');
+      setPage(1);
+    }, 300);
+    return () => clearTimeout(timeout);
+  }, [filter]);
+
+  useEffect(() => {
+    // New reports are pushed by the server instead of re-fetching the page
+    const source = subscribeToReports(modelName, {
+      onReport: (report) => {
+        // Pushed reports aren't ranked by the server, so they only join an unsearched first page
+        const matchesStatus = statusFilter === 'all' || report.status === statusFilter;
+        if (page === 1 && !search && matchesStatus) {
+          setReports((current) => [report, ...current].slice(0, limit));
+        }
+      },
+      onStats: setLiveStats,
+    });
+    return () => source.close();
+  }, [modelName, page, limit, search, statusFilter]);
+
   const handleDelete = async (reportId) => {
     try {
       await deleteReport(reportId);
@@ -69,13 +102,6 @@ const ReportBrowser = ({ modelName }) => {
     setPage(value);
   };
 
-  const filteredReports = reports.filter(report => {
-    const matchesText = report.method.toLowerCase().includes(filter.toLowerCase()) ||
-                        report.machine_id.toLowerCase().includes(filter.toLowerCase());
-    const matchesStatus = statusFilter === 'all' || report.status === statusFilter;
-    return matchesText && matchesStatus;
-  });
-
   const formatTimestamp = (timestamp) => {
     return new Date(timestamp).toLocaleString();
   };
@@ -142,20 +168,30 @@ const ReportBrowser = ({ modelName }) => {
             <Typography variant="h4" component="h1" gutterBottom>
               Reports for {modelName}
             </Typography>
+            {liveStats && (
+              <Typography variant="caption">
+                Last {liveStats.window_seconds}s: {liveStats.success} success / {liveStats.fail} fail
+              </Typography>
+            )}
           </Box>
           <Box sx={{ display: 'flex', gap: 2, mb: 3, alignItems: 'center' }}>
             <FilterListIcon color="action" />
             <TextField
-              label="Filter reports"
+              label="Search errors, tracebacks and methods"
               variant="outlined"
               value={filter}
               onChange={(e) => setFilter(e.target.value)}
+              helperText={filter.trim() && filter.trim().length < MIN_SEARCH_LENGTH
+                ? `Type at least ${MIN_SEARCH_LENGTH} characters to search` : undefined}
               size="small"
               sx={{ flexGrow: 1 }}
             />
             <Select
               value={statusFilter}
-              onChange={(e) => setStatusFilter(e.target.value)}
+              onChange={(e) => {
+                setStatusFilter(e.target.value);
+                setPage(1);
+              }}
               size="small"
               sx={{ minWidth: 120 }}
             >
@@ -168,7 +204,7 @@ const ReportBrowser = ({ modelName }) => {
       </Card>
 
       <Box sx={{ mt: 3 }}>
-        {filteredReports.map(report => (
+        {reports.map(report => (
           <Accordion key={report.id} sx={{ mb: 2 }}>
             <AccordionSummary
               expandIcon={<ExpandMoreIcon />}
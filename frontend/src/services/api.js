@@ -70,13 +70,40 @@ export const getMethodHistory = async (modelName, startDate, endDate) => {
   return response.data;
 };
 
-export const getReports = async (name, page = 1, limit = 10) => {
+export const getErrorRates = async (modelName) => {
+  const response = await api.get(`/models/${modelName}/error_rates`);
+  return response.data;
+};
+
+export const getUserActivity = async (modelName, startDate, endDate) => {
+  const response = await api.get(`/models/${modelName}/users/activity`, {
+    params: { start_date: startDate, end_date: endDate },
+  });
+  return response.data;
+};
+
+export const getRetention = async (modelName, period = 'week', periods = 8) => {
+  const response = await api.get(`/models/${modelName}/users/retention`, { params: { period, periods } });
+  return response.data;
+};
+
+export const getEnvironmentBreakdown = async (modelName, facet, startDate, endDate) => {
+  const response = await api.get(`/models/${modelName}/breakdown`, {
+    params: { facet, start_date: startDate, end_date: endDate },
+  });
+  return response.data;
+};
+
+export const getReports = async (name, page = 1, limit = 10, { q, status } = {}) => {
   const skip = (page-1) * limit;
 
   const params = new URLSearchParams({
     skip: skip.toString(),
     limit: limit.toString(),
   });
+  // Search and status filtering happen on the server, across all of the model's reports
+  if (q) params.append('q', q);
+  if (status) params.append('status', status);
 
   const response = await api.get(`/reports/${name}`, { params });
   if (response.status !== 200) {
@@ -88,4 +115,32 @@ export const getReports = async (name, page = 1, limit = 10) => {
 export const deleteReport = async (reportId) => {
   const response = await api.delete(`/reports/${reportId}`);
   return response.data;
-};
\ No newline at end of file
+};
+
+export const getJob = async (jobId) => {
+  const response = await api.get(`/jobs/${jobId}`);
+  return response.data;
+};
+
+// Poll a background job until it completes or fails, and return its final state
+export const waitForJob = async (jobId, interval = 1000) => {
+  for (;;) {
+    const job = await getJob(jobId);
+    if (job.status === 'completed' || job.status === 'failed') {
+      return job;
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval));
+  }
+};
+
+export const subscribeToReports = (name, { failuresOnly = false, onReport, onStats } = {}) => {
+  // EventSource can't send headers, so the token travels as a query parameter
+  const params = new URLSearchParams({
+    token: localStorage.getItem('token') || '',
+    failures_only: failuresOnly.toString(),
+  });
+  const source = new EventSource(`${API_URL}/reports/${name}/stream?${params}`);
+  if (onReport) source.addEventListener('report', (event) => onReport(JSON.parse(event.data)));
+  if (onStats) source.addEventListener('stats', (event) => onStats(JSON.parse(event.data)));
+  return source;
+};
@@ -0,0 +1,117 @@
+"""
+Measure the per-call overhead of the tracking code for each instrumentation mode.
+
+Wraps a tiny randomly initialised BERT classifier with subclass and hook instrumentation, loads
+each through the auto classes like an end user would, and times forward calls against the
+unwrapped model. send_report is replaced by a counter so the network isn't part of the
+measurement.
+
+A microsecond of overhead is lost in the noise of even a tiny model's forward pass, so every
+variant is also timed with the base class's forward replaced by a no-op: what remains is the
+cost of the call path and the tracking code alone. Prints a JSON summary:
+
+    python benchmark_instrumentation.py --calls 2000 --rounds 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import torch
+from transformers import AutoModelForSequenceClassification, BertConfig, BertForSequenceClassification
+
+import wrap_model
+
+
+def time_calls(models, inputs, calls, rounds):
+    """
+    Return the best mean duration of one call of each model, in microseconds.
+
+    Rounds alternate between the models so drift in machine load affects them all alike.
+    """
+    best = {name: float("inf") for name in models}
+    with torch.no_grad():
+        for model in models.values():
+            for _ in range(calls // 10):
+                model(inputs)
+        for _ in range(rounds):
+            for name, model in models.items():
+                start = time.perf_counter()
+                for _ in range(calls):
+                    model(inputs)
+                best[name] = min(best[name], (time.perf_counter() - start) / calls)
+    return {name: value * 1e6 for name, value in best.items()}
+
+
+def load_instrumented(source, mode, work_dir, methods, submodules):
+    save_directory = os.path.join(work_dir, f"wrapped_{mode}")
+    wrap_model.wrap_model(source, f"benchmark-{mode}", host="http://127.0.0.1:9", save_directory=save_directory,
+                          upload=False, instrumentation=mode, methods=methods, submodules=submodules)
+    model = AutoModelForSequenceClassification.from_pretrained(save_directory, trust_remote_code=True).eval()
+
+    sent = []
+    sys.modules[type(model).__module__].send_report = sent.append
+    return model, sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the per-call overhead of each instrumentation mode.")
+    parser.add_argument("--calls", type=int, default=2000, help="Forward calls per round")
+    parser.add_argument("--rounds", type=int, default=7, help="Rounds per mode; the fastest round is kept")
+    parser.add_argument("--submodules", default="", help="Comma-separated submodules to also hook in hooks mode")
+    args = parser.parse_args(argv)
+    submodules = tuple(s for s in args.submodules.split(",") if s)
+
+    work_dir = tempfile.mkdtemp(prefix="byne-benchmark-")
+    # The generated code caches the machine id under the working directory, and the log file goes there too
+    os.chdir(work_dir)
+    wrap_model.configure_logging()
+    torch.manual_seed(0)
+    torch.set_num_threads(1)
+    config = BertConfig(hidden_size=32, num_attention_heads=2, num_hidden_layers=1, intermediate_size=32, vocab_size=100)
+    source = os.path.join(work_dir, "tiny-bert")
+    BertForSequenceClassification(config).save_pretrained(source)
+    inputs = torch.randint(0, 100, (1, 8))
+
+    models = {"baseline": BertForSequenceClassification.from_pretrained(source).eval()}
+    reports = {}
+    for mode in ("subclass", "hooks"):
+        models[mode], reports[mode] = load_instrumented(source, mode, work_dir, ("forward", "generate"),
+                                                        submodules if mode == "hooks" else ())
+    timings = time_calls(models, inputs, args.calls, args.rounds)
+    # Counted before the no-op pass, whose calls report into the same lists
+    reported = {mode: len(sent) for mode, sent in reports.items()}
+    timed_calls = args.calls * args.rounds + args.calls // 10
+
+    output = models["baseline"](inputs)
+    original_forward = BertForSequenceClassification.forward
+    BertForSequenceClassification.forward = lambda self, *args, **kwargs: output
+    try:
+        noop_timings = time_calls(models, inputs, args.calls, args.rounds)
+    finally:
+        BertForSequenceClassification.forward = original_forward
+
+    baseline = timings["baseline"]
+    results = {
+        "baseline_us_per_call": round(baseline, 2),
+        "noop_forward_baseline_us_per_call": round(noop_timings["baseline"], 2),
+        "calls": args.calls,
+        "rounds": args.rounds,
+        "modes": {},
+    }
+    for mode in reports:
+        per_call = timings[mode]
+        results["modes"][mode] = {
+            "us_per_call": round(per_call, 2),
+            "overhead_us_per_call": round(noop_timings[mode] - noop_timings["baseline"], 2),
+            "overhead_pct_of_forward": round((noop_timings[mode] - noop_timings["baseline"]) / baseline * 100, 2),
+            "reports_per_call": round(reported[mode] / timed_calls, 3),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
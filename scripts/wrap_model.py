@@ -1,21 +1,32 @@
 import os
 import sys
 import json
+import time
 import shutil
+import hashlib
+import argparse
 import importlib
 import logging
 import datetime
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
 from transformers import (
     AutoConfig,
     AutoModel,
     AutoTokenizer,
+    PretrainedConfig,
 )
-from huggingface_hub import HfApi, HfFolder, upload_folder, login
+from huggingface_hub import HfApi, HfFolder, CommitOperationAdd, login, snapshot_download
 
-template_path = "./templates/class_template.py.txt"
-static_template_path = "./templates/static_template.py.txt"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+template_path = os.path.join(SCRIPT_DIR, "templates", "class_template.py.txt")
+static_template_path = os.path.join(SCRIPT_DIR, "templates", "static_template.py.txt")
+hook_template_path = os.path.join(SCRIPT_DIR, "templates", "hook_template.py.txt")
 save_directory = "./tmp/modified_model"
+GENERATED_FILES = {"config.json", "modeling_modified.py", "configuring_modified.py"}
+# Serializations of the weights that transformers doesn't load, skipped when downloading for a weightless wrap
+ALTERNATIVE_WEIGHT_PATTERNS = ["*.h5", "*.msgpack", "*.ot", "*.onnx", "*.onnx_data", "*.tflite", "*.gguf",
+                               "*.mlmodel", "*.pth", "onnx/*", "coreml/*", "original/*"]
 
 # ------------------------#
 # Step 1: Configure Logging
@@ -52,18 +63,23 @@ def configure_logging() -> logging.Logger:
 
     return logger
 
-logger = configure_logging()
+logger = logging.getLogger("ModelLogger")
+
+
+class WrapError(Exception):
+    """Raised when a model can't be wrapped; the message explains why."""
 
 # ------------------------#
 # Step 2: Get the model names and token
 # ------------------------#
 
-def get_user_inputs() -> Tuple[str, str, str, str]:
+def get_user_inputs() -> Tuple[str, str, str, bool]:
     """
     Prompt the user for necessary inputs and retrieve the Hugging Face token.
 
     Returns:
-        A tuple containing the original model name/path, target repository name and byne-serve address.
+        A tuple containing the original model name/path, target repository name, byne-serve address
+        and whether to wrap the model without loading its weights.
     """
 
     login()
@@ -81,40 +97,45 @@ def get_user_inputs() -> Tuple[str, str, str, str]:
     if host == "":
         host = default
 
-    return model_name_or_path, target_repo_name, host
-
+    # Weightless wrapping reuses the original files and only rewrites config.json
+    weightless = input("Wrap without loading the weights into memory? [Y/n]: ").strip().lower() != "n"
 
-model_name_or_path, target_repo_name, host = get_user_inputs()
+    return model_name_or_path, target_repo_name, host, weightless
 
 
 # ------------------------#
 # Step 3: Load the config and determine architectures
 # ------------------------#
 
-def load_model_config(model_name_or_path: str) -> Tuple[AutoConfig, List[str], str]:
+def load_model_config(model_name_or_path: str, allow_custom_code: bool = False) -> Tuple[AutoConfig, List[str], str]:
     """
     Load the model configuration and determine the architectures.
 
     Args:
         model_name_or_path: The name or path of the pre-trained model.
+        allow_custom_code: Accept models whose auto_map points to their own code (hook instrumentation only).
 
     Returns:
-        A tuple containing the config object, list of architectures, and config class name.
+        A tuple containing the config object, list of architectures, and config class name. For a custom
+        config class the name is its reference in auto_map, e.g. 'configuration_foo.FooConfig'.
     """
     logger.info(f"Loading configuration for model '{model_name_or_path}'.")
 
     # Load the configuration
     try:
-        config = AutoConfig.from_pretrained(model_name_or_path)
+        config_dict, _ = PretrainedConfig.get_config_dict(model_name_or_path)
+        if allow_custom_code and "AutoConfig" in config_dict.get("auto_map", {}):
+            # The config class lives in the repo's own code, which can't be imported without trust_remote_code
+            config = PretrainedConfig.from_dict(config_dict)
+        else:
+            config = AutoConfig.from_pretrained(model_name_or_path)
     except Exception as e:
-        logger.error(f"Failed to load configuration: {e}")
-        sys.exit(1)
+        raise WrapError(f"Failed to load configuration: {e}") from e
 
     # Get the list of architectures from config.json
     original_architectures = getattr(config, "architectures", None)
     if not original_architectures:
-        logger.error(f"No architectures found in config.json for {model_name_or_path}.")
-        sys.exit(1)
+        raise WrapError(f"No architectures found in config.json for {model_name_or_path}.")
 
     logger.info(f"Architectures found in config.json: {original_architectures}")
     config_class = config.__class__.__name__
@@ -123,13 +144,13 @@ def load_model_config(model_name_or_path: str) -> Tuple[AutoConfig, List[str], s
     auto_map = getattr(config, "auto_map", None)
 
     if auto_map:
-        logger.error(f"The model {model_name_or_path} relies on custom code. Please refer to the Documentation to enable custom code analysis.")
-        sys.exit(1)
+        if not allow_custom_code:
+            raise WrapError(f"The model {model_name_or_path} relies on custom code. Use hook instrumentation or refer to the Documentation to enable custom code analysis.")
+        config_class = auto_map.get("AutoConfig", config_class)
+        logger.info(f"Custom code model, config class: {config_class}")
 
     return config, original_architectures, config_class
 
-config, original_architectures, config_class = load_model_config(model_name_or_path)
-
 def get_auto_models_vocab(architectures: List[str]) -> Dict[str, str]:
     """
     Map original model architectures to their corresponding auto model classes.
@@ -173,8 +194,6 @@ def get_auto_models_vocab(architectures: List[str]) -> Dict[str, str]:
     logger.info(f"Auto models mapping: {auto_models_vocab}")
     return auto_models_vocab
 
-auto_models_vocab = get_auto_models_vocab(original_architectures)
-
 # ------------------------#
 # Step 4: Create modified classes for the architectures
 # ------------------------#
@@ -225,15 +244,66 @@ def create_modified_class_codes(original_architectures: List[str], template_path
 
         modified_model_class_codes[base_class_name_short] = modified_model_class_code
 
+    if not modified_class_names:
+        raise WrapError(f"None of the architectures {original_architectures} could be imported from transformers.")
+
     return modified_class_names, modified_model_class_codes
 
-modified_class_names, modified_model_class_codes = create_modified_class_codes(original_architectures, template_path)
+def create_hook_instrumented_code(original_architectures: List[str], auto_map: Optional[Dict[str, Any]], methods: List[str],
+                                  submodules: List[str], hook_template_path: str = hook_template_path) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Create the code for hook-based instrumentation.
+
+    The instrumentation itself is generic: it attaches forward hooks to the model and the listed
+    submodules at load time and wraps the other listed methods on the instance. Each architecture
+    only adds an import and an `instrument(...)` binding, so models with custom code work as well.
+
+    Args:
+        original_architectures: List of original architecture class names.
+        auto_map: The original auto_map of the model, if it has custom code.
+        methods: Model methods to track ("forward" uses module hooks).
+        submodules: Dotted names of submodules whose forward to track.
+        hook_template_path: Path to the hook template file.
+
+    Returns:
+        A tuple containing:
+            - A dictionary mapping base class names to instrumented class names.
+            - A dictionary holding the instrumentation code.
+    """
+    transformers_module = importlib.import_module("transformers")
+    custom_classes = {ref.split('.')[-1]: ref for ref in (auto_map or {}).values() if isinstance(ref, str)}
+
+    with open(hook_template_path, 'r') as template_file:
+        code = template_file.read().format(methods=repr(list(methods)), submodules=repr(list(submodules)))
+
+    modified_class_names = {}
+    bindings = []
+    for base_class_name in original_architectures:
+        base_class_name_short = base_class_name.split('.')[-1]
+        reference = custom_classes.get(base_class_name_short)
+        if reference:
+            if "--" in reference:
+                raise WrapError(f"{base_class_name_short} is defined in another repository ({reference}), which hook instrumentation doesn't support.")
+            bindings.append(f"from .{reference.rsplit('.', 1)[0]} import {base_class_name_short}")
+        elif hasattr(transformers_module, base_class_name_short):
+            bindings.append(f"from transformers import {base_class_name_short}")
+        else:
+            logger.warning(f"Could not import {base_class_name_short} from transformers or the model's code.")
+            continue
+        modified_class_name = f"Instrumented{base_class_name_short}"
+        modified_class_names[base_class_name_short] = modified_class_name
+        bindings.append(f"{modified_class_name} = instrument({base_class_name_short})\n")
+
+    if not modified_class_names:
+        raise WrapError(f"None of the architectures {original_architectures} could be imported.")
+
+    return modified_class_names, {"instrumentation": code + "\n" + "\n".join(bindings)}
 
 # ------------------------#
 # Step 5: Save the modified classes to code files
 # ------------------------#
 
-def save_modified_classes(modified_model_class_codes: Dict[str, str], config_class: str, save_directory: str) -> None:
+def save_modified_classes(modified_model_class_codes: Dict[str, str], config_class: str, save_directory: str, host: str, static_template_path: str = static_template_path) -> None:
     """
     Save the modified model classes and configuration to code files.
 
@@ -241,6 +311,8 @@ def save_modified_classes(modified_model_class_codes: Dict[str, str], config_cla
         modified_model_class_codes: Dictionary of modified model class code.
         config_class: Name of the configuration class.
         save_directory: Directory to save the modified code files.
+        host: byne-serve address the generated code reports to.
+        static_template_path: Path to the static utility code template.
     """
     # Create the code directory
     os.makedirs(save_directory, exist_ok=True)
@@ -264,36 +336,39 @@ def save_modified_classes(modified_model_class_codes: Dict[str, str], config_cla
         for code in modified_model_class_codes.values():
             f.write(code + "\n")
 
-    # Create configuring_modified.py
+    # Create configuring_modified.py; a custom config class is imported from the model's own code
     with open(config_code_file, "w") as f:
-        f.write(f'from transformers import {config_class}\n')
-
-save_modified_classes(modified_model_class_codes, config_class, save_directory)
+        if '.' in config_class:
+            module, class_name = config_class.rsplit('.', 1)
+            f.write(f'from .{module} import {class_name}\n')
+        else:
+            f.write(f'from transformers import {config_class}\n')
 
 # ------------------------#
-# Step 6: Instantiate the model and update the config
+# Step 6: Write the wrapped model, either reusing the original files or by instantiating the model
 # ------------------------#
 
-def instantiate_and_update_model(model_name_or_path: str, base_model_name: str, modified_class_names: Dict[str, str], auto_models_vocab: Dict[str, str], save_directory: str, config_class: str) -> None:
+def build_auto_map(modified_class_names: Dict[str, str], auto_models_vocab: Dict[str, str], config_class: str,
+                   original_auto_map: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
     """
-    Instantiate the model and update its configuration.
+    Build the auto_map field binding the auto classes to the modified classes.
 
     Args:
-        model_name_or_path: Original model name or path.
-        base_model_name: Name of the base model class.
         modified_class_names: Dictionary of modified class names.
         auto_models_vocab: Mapping of architectures to auto model class names.
-        save_directory: Directory to save the modified model.
         config_class: Name of the configuration class.
-    """
-    logger.info("Instantiating the model and updating the config. This might take a while...")
-
-    transformers_module = importlib.import_module("transformers")
-    model_class = getattr(transformers_module, base_model_name)
-    model = model_class.from_pretrained(model_name_or_path)
+        original_auto_map: The model's own auto_map, if it has custom code. Entries pointing to
+            instrumented classes are redirected, the others (e.g. tokenizers) are kept.
 
-    # Prepare the auto_map field
+    Returns:
+        The auto_map dictionary for config.json.
+    """
     new_auto_map = {}
+    for auto_class, reference in (original_auto_map or {}).items():
+        if isinstance(reference, str) and reference.split('.')[-1] in modified_class_names:
+            new_auto_map[auto_class] = f'modeling_modified.{modified_class_names[reference.split(".")[-1]]}'
+        else:
+            new_auto_map[auto_class] = reference
     for base_class_name_short, mod_class_name in modified_class_names.items():
         key = base_class_name_short
         model_name = auto_models_vocab.get(key)
@@ -303,12 +378,32 @@ def instantiate_and_update_model(model_name_or_path: str, base_model_name: str,
     # Ensure 'AutoModel' is mapped to the first modified class
     first_modified_class = next(iter(modified_class_names.values()))
     new_auto_map['AutoModel'] = f'modeling_modified.{first_modified_class}'
-    new_auto_map['AutoConfig'] = f'configuring_modified.{config_class}'
+    new_auto_map['AutoConfig'] = f'configuring_modified.{config_class.split(".")[-1]}'
+    return new_auto_map
+
+def instantiate_and_update_model(model_name_or_path: str, base_model_name: str, modified_class_names: Dict[str, str], auto_models_vocab: Dict[str, str], save_directory: str, config_class: str) -> None:
+    """
+    Instantiate the model and update its configuration.
+
+    Args:
+        model_name_or_path: Original model name or path.
+        base_model_name: Name of the base model class.
+        modified_class_names: Dictionary of modified class names.
+        auto_models_vocab: Mapping of architectures to auto model class names.
+        save_directory: Directory to save the modified model.
+        config_class: Name of the configuration class.
+    """
+    logger.info("Instantiating the model and updating the config. This might take a while...")
+
+    transformers_module = importlib.import_module("transformers")
+    model_class = getattr(transformers_module, base_model_name)
+    model = model_class.from_pretrained(model_name_or_path)
 
     # Update the model's config object
-    model.config.auto_map = new_auto_map
+    model.config.auto_map = build_auto_map(modified_class_names, auto_models_vocab, config_class)
 
     # Save the model (this will save the updated config)
+    unlink_shared_files(save_directory)
     model.save_pretrained(save_directory)
     config = AutoConfig.from_pretrained(save_directory)
     config.architectures = list(modified_class_names.values())
@@ -317,29 +412,214 @@ def instantiate_and_update_model(model_name_or_path: str, base_model_name: str,
     # Copy the tokenizer files if they exist
     try:
         tokenizer = AutoTokenizer.from_pretrained(model_name_or_path)
+        unlink_shared_files(save_directory)
         tokenizer.save_pretrained(save_directory)
     except Exception as e:
         logger.warning(f"Could not save tokenizer: {e}")
 
-base_model_name = original_architectures[0]
-instantiate_and_update_model(model_name_or_path, base_model_name, modified_class_names, auto_models_vocab, save_directory, config_class)
+def locate_model_files(model_name_or_path: str, api: Optional[HfApi] = None) -> str:
+    """
+    Return a local directory holding the original model files, downloading them if needed.
+
+    Only the weights transformers loads are downloaded: safetensors when the repository has them,
+    PyTorch bins otherwise. The same weights in other formats (TensorFlow, Flax, ONNX, GGUF, original
+    checkpoints, ...) are skipped.
+
+    Args:
+        model_name_or_path: Original model name or path.
+        api: Hugging Face Hub client used to list the repository (defaults to HfApi()).
+
+    Returns:
+        Path of the local directory with the model files.
+    """
+    if os.path.isdir(model_name_or_path):
+        return model_name_or_path
+    logger.info(f"Fetching the files of '{model_name_or_path}' from the Hugging Face Hub.")
+    ignore_patterns = list(ALTERNATIVE_WEIGHT_PATTERNS)
+    repo_files = (api or HfApi()).list_repo_files(model_name_or_path)
+    if any(name.endswith(".safetensors") for name in repo_files):
+        ignore_patterns.append("pytorch_model*.bin")
+    return snapshot_download(repo_id=model_name_or_path, ignore_patterns=ignore_patterns)
+
+def link_or_copy(src: str, dst: str) -> str:
+    """
+    Place src at dst without reading it through Python when possible.
+
+    Tries a hardlink first, then a copy-on-write reflink, and falls back to a plain copy.
+
+    Returns:
+        The method used: "hardlink", "reflink" or "copy".
+    """
+    src = os.path.realpath(src)
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    try:
+        import fcntl
+        FICLONE = 0x40049409  # Linux ioctl cloning an extent map (btrfs, xfs, ...)
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return "reflink"
+    except (ImportError, OSError):
+        if os.path.exists(dst):
+            os.remove(dst)
+    shutil.copy2(src, dst)
+    return "copy"
+
+def prepare_save_directory(save_directory: str, source_directory: Optional[str] = None) -> None:
+    """
+    Start from an empty save_directory.
+
+    A weightless wrap hardlinks the original files into save_directory, so anything a later run
+    wrote over them there would be written into the original model. Removing the directory only
+    removes the links.
+
+    Args:
+        save_directory: Directory the wrapped model is written to.
+        source_directory: Local directory of the original model, which save_directory must not overlap.
+    """
+    save_path = os.path.realpath(save_directory)
+    if os.path.commonpath([save_path, os.getcwd()]) == save_path:
+        raise WrapError(f"The save directory '{save_directory}' contains the working directory.")
+    if source_directory is not None:
+        source_path = os.path.realpath(source_directory)
+        if os.path.commonpath([save_path, source_path]) in (save_path, source_path):
+            raise WrapError(f"The save directory '{save_directory}' overlaps the model directory '{source_directory}'.")
+    if os.path.lexists(save_directory):
+        logger.info(f"Clearing the previous output in '{save_directory}'.")
+        shutil.rmtree(save_directory)
+    os.makedirs(save_directory)
+
+def unlink_shared_files(directory: str) -> None:
+    """
+    Remove the files of directory that are hardlinked elsewhere, so writing the same paths creates
+    new files instead of modifying the linked ones.
+    """
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            if not os.path.islink(path) and os.stat(path).st_nlink > 1:
+                os.remove(path)
+
+def wrap_without_weights(model_name_or_path: str, modified_class_names: Dict[str, str], auto_models_vocab: Dict[str, str], save_directory: str, config_class: str) -> None:
+    """
+    Wrap the model without deserializing it: reuse the weight shards and tokenizer files as they are
+    and rewrite only config.json. The generated code files must already be in save_directory.
+
+    Args:
+        model_name_or_path: Original model name or path.
+        modified_class_names: Dictionary of modified class names.
+        auto_models_vocab: Mapping of architectures to auto model class names.
+        save_directory: Directory to save the modified model.
+        config_class: Name of the configuration class.
+    """
+    source_directory = locate_model_files(model_name_or_path)
+    logger.info(f"Reusing the files in '{source_directory}' without loading the weights.")
+    os.makedirs(save_directory, exist_ok=True)
+
+    methods = {}
+    for root, dirs, files in os.walk(source_directory):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        relative_root = os.path.relpath(root, source_directory)
+        for file_name in files:
+            relative_path = os.path.normpath(os.path.join(relative_root, file_name))
+            dst = os.path.join(save_directory, relative_path)
+            # config.json is rewritten below and the generated code files are already in place;
+            # never link over them, as writing through a hardlink would modify the source.
+            if file_name.startswith('.') or relative_path in GENERATED_FILES:
+                continue
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if os.path.lexists(dst):
+                os.remove(dst)
+            method = link_or_copy(os.path.join(root, file_name), dst)
+            methods[method] = methods.get(method, 0) + 1
+    logger.info(f"Reused original files: {methods}")
+
+    with open(os.path.join(source_directory, "config.json"), 'r') as f:
+        config_dict = json.load(f)
+    config_dict["auto_map"] = build_auto_map(modified_class_names, auto_models_vocab, config_class, config_dict.get("auto_map"))
+    config_dict["architectures"] = list(modified_class_names.values())
+    config_path = os.path.join(save_directory, "config.json")
+    if os.path.lexists(config_path):
+        os.remove(config_path)
+    with open(config_path, 'w') as f:
+        json.dump(config_dict, f, indent=2, sort_keys=True)
+        f.write("\n")
 
 # ------------------------#
 # Step 7: Upload to Hugging Face Hub
 # ------------------------#
 
-def upload_to_huggingface_hub(repo_name: str, save_directory: str) -> None:
+def local_file_matches(path: str, remote_file) -> bool:
+    """
+    Check whether a local file has the same content as a file listed in the target repository.
+
+    LFS files are compared by sha256, regular files by their git blob id, so only one pass over
+    the local file is needed and nothing is downloaded.
+
+    Args:
+        path: Path of the local file.
+        remote_file: RepoFile entry from HfApi.list_repo_tree.
+
+    Returns:
+        True if the contents are identical.
+    """
+    size = os.path.getsize(path)
+    if size != (remote_file.lfs.size if remote_file.lfs else remote_file.size):
+        return False
+    digest = hashlib.sha256() if remote_file.lfs else hashlib.sha1(f"blob {size}\0".encode())
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(8 * 1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest() == (remote_file.lfs.sha256 if remote_file.lfs else remote_file.blob_id)
+
+def changed_files(api: HfApi, repo_id: str, save_directory: str) -> Tuple[List[str], List[str]]:
     """
-    Upload the modified model to the Hugging Face Hub.
+    Split the files of save_directory into those that differ from the target repository and those already there.
+
+    Args:
+        api: Hugging Face Hub client.
+        repo_id: Id of the target repository.
+        save_directory: Directory containing the modified model files.
+
+    Returns:
+        A tuple of (changed, unchanged) paths relative to save_directory.
+    """
+    remote_files = {f.path: f for f in api.list_repo_tree(repo_id, recursive=True) if hasattr(f, "blob_id")}
+    changed, unchanged = [], []
+    for root, dirs, files in os.walk(save_directory):
+        dirs[:] = [d for d in dirs if d != ".ipynb_checkpoints"]
+        for file_name in files:
+            local_path = os.path.join(root, file_name)
+            path_in_repo = os.path.relpath(local_path, save_directory).replace(os.sep, "/")
+            remote_file = remote_files.get(path_in_repo)
+            if remote_file is not None and local_file_matches(local_path, remote_file):
+                unchanged.append(path_in_repo)
+            else:
+                changed.append(path_in_repo)
+    return changed, unchanged
+
+def upload_to_huggingface_hub(repo_name: str, save_directory: str, api: Optional[HfApi] = None) -> str:
+    """
+    Upload the modified model to the Hugging Face Hub, pushing only the files that changed.
+
+    Re-wrapping a model usually changes config.json and the generated code files only, so the
+    weight shards already in the target repository are not transferred again.
 
     Args:
         repo_name: Name of the target repository.
         save_directory: Directory containing the modified model files.
+        api: Hugging Face Hub client (defaults to HfApi(); any object with the same methods works).
+
+    Returns:
+        The id of the repository the model was uploaded to.
     """
     logger.info("Uploading the model to the Hugging Face Hub.")
 
     # Get user information
-    api = HfApi()
+    api = api or HfApi()
     user = api.whoami()
     username = user["name"]
 
@@ -351,18 +631,284 @@ def upload_to_huggingface_hub(repo_name: str, save_directory: str) -> None:
     # Create the repository
     api.create_repo(repo_id=repo_id, exist_ok=True)
 
-    # Upload the folder
-    upload_folder(
-        folder_path=save_directory,
-        path_in_repo=".",
-        repo_id=repo_id,
-        commit_message="Upload modified model with logging",
-        ignore_patterns=["*.ipynb_checkpoints"]
-    )
+    changed, unchanged = changed_files(api, repo_id, save_directory)
+    logger.info(f"{len(changed)} files changed, {len(unchanged)} already up to date in '{repo_id}'.")
 
-    logger.info(f"Model uploaded to {repo_id}")
+    if changed:
+        api.create_commit(
+            repo_id=repo_id,
+            operations=[CommitOperationAdd(path_in_repo=path, path_or_fileobj=os.path.join(save_directory, path))
+                        for path in changed],
+            commit_message="Upload modified model with logging",
+        )
+        logger.info(f"Model uploaded to {repo_id}")
+    else:
+        logger.info(f"Nothing to upload, {repo_id} is up to date")
 
     shutil.rmtree(save_directory)
     logger.info(f"Cleaned up the tmp storage at {save_directory}")
 
-upload_to_huggingface_hub(target_repo_name, save_directory)
\ No newline at end of file
+    return repo_id
+
+# ------------------------#
+# Step 8: Run the pipeline, for one model or a whole manifest
+# ------------------------#
+
+def wrap_model(model_name_or_path: str, target_repo_name: str, host: Optional[str] = None, save_directory: str = save_directory,
+               weightless: bool = True, upload: bool = True, instrumentation: str = "subclass",
+               methods: Tuple[str, ...] = ("forward", "generate"), submodules: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """
+    Run every wrapping step for one model.
+
+    Args:
+        model_name_or_path: Original model name or path.
+        target_repo_name: Name of the target repository.
+        host: byne-serve address (defaults to the hosted byne-serve endpoint for the target repo).
+        save_directory: Directory to write the wrapped model to.
+        weightless: Reuse the original files instead of loading the weights.
+        upload: Upload the wrapped model to the Hugging Face Hub.
+        instrumentation: "subclass" generates a decorated subclass per architecture; "hooks" attaches
+            module hooks at load time and also supports models with custom code.
+        methods: Methods tracked in hook instrumentation.
+        submodules: Submodules whose forward is tracked in hook instrumentation.
+
+    Returns:
+        A dictionary with the output location and the duration of each step in seconds.
+    """
+    host = host or f'https://report.byne-serve.com/reports/{target_repo_name}'
+    timings = {}
+
+    def timed(step, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[step] = round(time.perf_counter() - start, 3)
+        return result
+
+    local_source = model_name_or_path if os.path.isdir(model_name_or_path) else None
+    prepare_save_directory(save_directory, local_source)
+
+    try:
+        hooks = instrumentation == "hooks"
+        config, original_architectures, config_class = timed("load_config", load_model_config, model_name_or_path, hooks)
+        auto_map = getattr(config, "auto_map", None)
+        if auto_map and not weightless:
+            raise WrapError("Models with custom code can only be wrapped without loading their weights.")
+        auto_models_vocab = timed("auto_models", get_auto_models_vocab, original_architectures)
+        if hooks:
+            modified_class_names, modified_model_class_codes = timed(
+                "generate_classes", create_hook_instrumented_code, original_architectures, auto_map, methods, submodules)
+        else:
+            modified_class_names, modified_model_class_codes = timed(
+                "generate_classes", create_modified_class_codes, original_architectures, template_path)
+        timed("save_code", save_modified_classes, modified_model_class_codes, config_class, save_directory, host)
+        if weightless:
+            timed("save_model", wrap_without_weights, model_name_or_path, modified_class_names, auto_models_vocab,
+                  save_directory, config_class)
+        else:
+            timed("save_model", instantiate_and_update_model, model_name_or_path, original_architectures[0],
+                  modified_class_names, auto_models_vocab, save_directory, config_class)
+
+        result = {"output": save_directory}
+        if upload:
+            result["output"] = timed("upload", upload_to_huggingface_hub, target_repo_name, save_directory)
+    except Exception:
+        # Half-written output is of no use, and leaving it would look like a wrapped model
+        shutil.rmtree(save_directory, ignore_errors=True)
+        raise
+    result["timings"] = timings
+    return result
+
+def entry_save_directory(entry: Dict[str, Any], output_dir: str) -> str:
+    """
+    Return the directory a manifest entry is written to: its "save_directory", or output_dir/<target>.
+
+    The directory is cleared before wrapping, so it must resolve to a sub-directory of output_dir;
+    an absolute or "../" target or save_directory can't point it anywhere else.
+
+    Args:
+        entry: Dictionary with "source", "target" and optionally "host" and "save_directory".
+        output_dir: Directory holding one sub-directory per wrapped model.
+
+    Returns:
+        The save directory of the entry.
+
+    Raises:
+        WrapError: If the entry misses a field or its save directory is outside output_dir.
+    """
+    if not entry.get("source") or not entry.get("target"):
+        raise WrapError("Manifest entries need a 'source' and a 'target'.")
+    path = entry.get("save_directory") or os.path.join(output_dir, entry["target"])
+    root = os.path.realpath(output_dir)
+    resolved = os.path.realpath(path)
+    if resolved == root or os.path.commonpath([root, resolved]) != root:
+        raise WrapError(f"The save directory '{path}' is not inside the output directory '{output_dir}'.")
+    return path
+
+def conflicting_entries(save_directories: Dict[int, str]) -> Dict[int, str]:
+    """
+    Find the entries whose save directory is the same as, or inside, the save directory of another.
+
+    Each entry clears its directory when it starts, so such entries would delete each other's output.
+
+    Args:
+        save_directories: Save directory of each entry, by manifest index.
+
+    Returns:
+        The save directory of each conflicting entry, by manifest index.
+    """
+    # Sorted by path components, the directories nested in a path directly follow it
+    ordered = sorted(save_directories, key=lambda index: os.path.realpath(save_directories[index]).split(os.sep))
+    conflicts = {}
+    top = None
+    for index in ordered:
+        path = os.path.realpath(save_directories[index])
+        if top is not None and os.path.commonpath([top[1], path]) == top[1]:
+            conflicts[top[0]] = save_directories[top[0]]
+            conflicts[index] = save_directories[index]
+        else:
+            top = (index, path)
+    return conflicts
+
+def failed_result(entry: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    """Result of a manifest entry that failed with `error`."""
+    return {"source": entry.get("source"), "target": entry.get("target"),
+            "status": "fail", "error": f"{type(error).__name__}: {error}"}
+
+def wrap_entry(entry: Dict[str, Any], output_dir: str, weightless: bool, upload: bool, **wrap_options) -> Dict[str, Any]:
+    """
+    Wrap one manifest entry, turning any failure into a result so the other models carry on.
+
+    Args:
+        entry: Dictionary with "source", "target" and optionally "host" and "save_directory".
+        output_dir: Directory holding one sub-directory per wrapped model, unless the entry sets "save_directory".
+        weightless: Reuse the original files instead of loading the weights.
+        upload: Upload the wrapped model to the Hugging Face Hub.
+        wrap_options: Instrumentation options passed on to wrap_model.
+
+    Returns:
+        The entry with its status, error, output and step timings.
+    """
+    configure_logging()
+    start = time.perf_counter()
+    result = {"source": entry.get("source"), "target": entry.get("target")}
+    try:
+        result.update(wrap_model(entry["source"], entry["target"], entry.get("host"),
+                                 entry_save_directory(entry, output_dir), weightless, upload, **wrap_options))
+        result["status"] = "success"
+    except Exception as e:
+        logger.error(f"Wrapping {entry.get('source')} failed: {e}")
+        result.update(status="fail", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def load_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """
+    Read a manifest in JSON Lines format: one {"source": ..., "target": ..., "host": ...} object per line.
+
+    Args:
+        manifest_path: Path to the manifest file.
+
+    Returns:
+        The list of manifest entries.
+    """
+    with open(manifest_path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def wrap_manifest(entries: List[Dict[str, Any]], output_dir: str, workers: int, weightless: bool, upload: bool, **wrap_options) -> List[Dict[str, Any]]:
+    """
+    Wrap many models concurrently in a process pool; a failing model doesn't stop the others.
+
+    Returns:
+        One result per entry, in manifest order.
+    """
+    results = [None] * len(entries)
+    save_directories = {}
+    for index, entry in enumerate(entries):
+        try:
+            save_directories[index] = entry_save_directory(entry, output_dir)
+        except WrapError as e:
+            results[index] = failed_result(entry, e)
+    for index, path in conflicting_entries(save_directories).items():
+        results[index] = failed_result(entries[index], WrapError(
+            f"The save directory '{path}' is the same as, or inside, the save directory of another entry."))
+        del save_directories[index]
+    for index, result in enumerate(results):
+        if result is not None:
+            logger.error(f"Skipping {result['source']} -> {result['target']}: {result['error']}")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(wrap_entry, entries[index], output_dir, weightless, upload, **wrap_options): index
+                   for index in save_directories}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. killed for using too much memory)
+                results[index] = failed_result(entries[index], e)
+                shutil.rmtree(save_directories[index], ignore_errors=True)
+            logger.info(f"{results[index]['status']}: {results[index]['source']} -> {results[index]['target']}")
+    return results
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Wrap Hugging Face models with byne-serve tracking code.")
+    parser.add_argument("--source", help="Original model name or path (e.g., 'ProsusAI/finbert')")
+    parser.add_argument("--target", help="Target repository name (e.g., 'my-logged-model')")
+    parser.add_argument("--host", help="byne-serve address without a slash at the end")
+    parser.add_argument("--manifest", help="JSON Lines file with one {source, target, host} object per model")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel workers in manifest mode")
+    parser.add_argument("--output-dir", default="./tmp", help="Directory for the wrapped models in manifest mode")
+    parser.add_argument("--save-directory", default=save_directory, help="Directory for the wrapped model in single mode, inside --output-dir")
+    parser.add_argument("--load-weights", action="store_true", help="Instantiate the model instead of reusing its files")
+    parser.add_argument("--no-upload", action="store_true", help="Only write the wrapped model locally")
+    parser.add_argument("--instrumentation", choices=["subclass", "hooks"], default="subclass",
+                        help="'hooks' attaches module hooks at load time and supports models with custom code")
+    parser.add_argument("--methods", default="forward,generate", help="Comma-separated methods to track with hooks")
+    parser.add_argument("--submodules", default="", help="Comma-separated submodule names to track with hooks")
+    parser.add_argument("--summary", default="./tmp/wrap_summary.json", help="Where to write the JSON summary")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point. Without arguments the script prompts for its inputs, as it always did.
+
+    Returns:
+        The process exit code: 0 if every model was wrapped, 1 otherwise.
+    """
+    configure_logging()
+    args = parse_args(argv)
+    weightless = not args.load_weights
+    upload = not args.no_upload
+    wrap_options = {
+        "instrumentation": args.instrumentation,
+        "methods": tuple(m.strip() for m in args.methods.split(",") if m.strip()),
+        "submodules": tuple(m.strip() for m in args.submodules.split(",") if m.strip()),
+    }
+
+    if args.manifest:
+        results = wrap_manifest(load_manifest(args.manifest), args.output_dir, args.workers, weightless, upload, **wrap_options)
+    else:
+        if args.source and args.target:
+            model_name_or_path, target_repo_name, host = args.source, args.target, args.host
+        elif args.source or args.target:
+            logger.error("--source and --target must be given together.")
+            return 2
+        else:
+            model_name_or_path, target_repo_name, host, weightless = get_user_inputs()
+        entry = {"source": model_name_or_path, "target": target_repo_name, "host": host,
+                 "save_directory": args.save_directory}
+        results = [wrap_entry(entry, args.output_dir, weightless, upload, **wrap_options)]
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.summary)), exist_ok=True)
+    with open(args.summary, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    failed = [r for r in results if r["status"] != "success"]
+    logger.info(f"Wrapped {len(results) - len(failed)}/{len(results)} models. Summary written to {args.summary}")
+    for result in failed:
+        logger.error(f"{result['source']} -> {result['target']}: {result['error']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Benchmark the listing and history endpoints against their previous ORM + response_model path.
+
+Seeds a throwaway database with traceback-heavy reports (see load_reports.ReportFactory), mounts
+the previous implementations of read_reports, read_models and get_method_history under /legacy
+next to the current ones, and calls both in-process through the ASGI app. Prints rows/sec for
+each as JSON:
+
+    python tests/benchmark_serialization.py --reports 20000 --page-size 1000
+
+Pass --database-url to run against Postgres instead of a temporary SQLite file.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(TESTS_DIR, "..", "backend")
+
+
+def configure_environment(database_url):
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("CORS_ORIGINS", "http://localhost")
+    os.environ.setdefault("BACKEND_HOST", "127.0.0.1")
+    sys.path[:0] = [BACKEND_DIR, TESTS_DIR]
+
+
+def register_sqlite_date_trunc(engine):
+    """SQLite has no date_trunc; provide the 'day' truncation the history endpoint uses."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function(
+            "date_trunc", 2, lambda period, value: value[:10] + " 00:00:00.000000" if value else None)
+
+    # Connections opened before this don't have it yet
+    engine.dispose()
+
+
+def legacy_router():
+    """The implementations of the three endpoints before they selected column tuples."""
+    from typing import List
+    from fastapi import APIRouter, Depends
+    from sqlalchemy import func
+    from sqlalchemy.orm import Session
+    from app.db.database import get_db
+    from app.db.models import Model, Report
+    from app.schemas.model import ModelOut, MethodHistory, DailyCount
+    from app.schemas.report import ReportOut
+
+    router = APIRouter()
+
+    @router.get("/models", response_model=List[ModelOut])
+    def read_models(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+        return db.query(Model).offset(skip).limit(limit).all()
+
+    @router.get("/reports/{model_name}", response_model=List[ReportOut])
+    def read_reports(model_name: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+        db_model = db.query(Model).filter(Model.name == model_name).first()
+        return db.query(Report).filter(Report.model_id == db_model.id) \
+            .order_by(Report.timestamp.desc()).offset(skip).limit(limit).all()
+
+    @router.get("/history/{model_name}", response_model=List[MethodHistory])
+    def get_method_history(model_name: str, start_date: datetime.datetime, end_date: datetime.datetime,
+                           db: Session = Depends(get_db)):
+        db_model = db.query(Model).filter(Model.name == model_name).first()
+        day = func.date_trunc('day', Report.timestamp, type_=Report.timestamp.type)
+        reports = db.query(day.label('date'), Report.method, func.count().label('count')) \
+            .filter(Report.model_id == db_model.id, Report.timestamp.between(start_date, end_date)) \
+            .group_by(day, Report.method).all()
+        method_history = {}
+        for report in reports:
+            method_history.setdefault(report.method, []).append(
+                DailyCount(date=report.date.strftime("%Y-%m-%d"), count=report.count))
+        return [MethodHistory(method=method, history=history) for method, history in method_history.items()]
+
+    return router
+
+
+def seed(args):
+    from load_reports import ReportFactory
+    from app.db.database import SessionLocal
+    from app.db.models import Model, Report
+
+    factory = ReportFactory(argparse.Namespace(fail_ratio=args.fail_ratio, traceback_frames=args.traceback_frames,
+                                               machines=1000, zipf_s=1.1), seed=0)
+    rng = random.Random(0)
+    now = datetime.datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.add_all(Model(name=f"benchmark-{i}") for i in range(args.models))
+        db.commit()
+        model_id = db.query(Model.id).filter(Model.name == "benchmark-0").scalar()
+        for start in range(0, args.reports, 5000):
+            rows = []
+            for _ in range(min(5000, args.reports - start)):
+                report = factory.generate_report()
+                report["timestamp"] = now - datetime.timedelta(seconds=rng.randint(0, args.days * 86400))
+                rows.append(dict(report, model_id=model_id))
+            db.bulk_insert_mappings(Report, rows)
+            db.commit()
+    finally:
+        db.close()
+
+
+def rows_per_second(client, url, params, count_rows, min_time):
+    response = client.get(url, params=params)
+    response.raise_for_status()
+    rows = count_rows(response.json())
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        client.get(url, params=params)
+        calls += 1
+    elapsed = time.perf_counter() - start
+    return {"rows_per_call": rows, "calls": calls, "ms_per_call": round(elapsed / calls * 1000, 2),
+            "rows_per_sec": round(rows * calls / elapsed)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fast-path serialization of the listing endpoints.")
+    parser.add_argument("--database-url", help="Database to seed (defaults to a temporary SQLite file)")
+    parser.add_argument("--reports", type=int, default=20000, help="Reports to seed")
+    parser.add_argument("--models", type=int, default=1000, help="Models to seed")
+    parser.add_argument("--days", type=int, default=30, help="Days the reports are spread over")
+    parser.add_argument("--fail-ratio", type=float, default=0.5, help="Share of reports with a traceback and env_info")
+    parser.add_argument("--traceback-frames", type=int, default=12, help="Median traceback depth in frames")
+    parser.add_argument("--page-size", type=int, default=1000, help="Reports and models per listing call")
+    parser.add_argument("--min-time", type=float, default=3.0, help="Seconds spent timing each endpoint")
+    args = parser.parse_args(argv)
+
+    configure_environment(args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='byne-benchmark-')}/bench.db")
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.api.auth import get_current_user
+    from app.db.database import engine
+
+    if engine.dialect.name == "sqlite":
+        register_sqlite_date_trunc(engine)
+    app.dependency_overrides[get_current_user] = lambda: None
+    app.include_router(legacy_router(), prefix="/legacy")
+
+    now = datetime.datetime.utcnow()
+    history_range = {"start_date": (now - datetime.timedelta(days=args.days + 1)).isoformat(),
+                     "end_date": now.isoformat()}
+    endpoints = {
+        "read_reports": ("/reports/benchmark-0", "/legacy/reports/benchmark-0", {"limit": args.page_size}, len),
+        "read_models": ("/models/", "/legacy/models", {"limit": args.page_size}, len),
+        "get_method_history": ("/models/benchmark-0/history", "/legacy/history/benchmark-0", history_range,
+                               lambda body: sum(len(method["history"]) for method in body)),
+    }
+
+    results = {"reports": args.reports, "page_size": args.page_size, "dialect": engine.dialect.name, "endpoints": {}}
+    # The schema is set up by the app's startup
+    with TestClient(app) as client:
+        seed(args)
+        for name, (url, legacy_url, params, count_rows) in endpoints.items():
+            assert client.get(url, params=params).json() == client.get(legacy_url, params=params).json(), name
+            before = rows_per_second(client, legacy_url, params, count_rows, args.min_time)
+            after = rows_per_second(client, url, params, count_rows, args.min_time)
+            results["endpoints"][name] = {"before": before, "after": after,
+                                          "speedup": round(after["rows_per_sec"] / before["rows_per_sec"], 2)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
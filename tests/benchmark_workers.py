@@ -0,0 +1,66 @@
+"""
+Benchmark ingestion throughput across worker counts of the production server (app.server).
+
+For each worker count, starts a backend on a fresh database, registers the model, runs the
+load generator of load_reports.py against it and prints requests/sec and the scaling relative
+to a single worker as JSON:
+
+    python tests/benchmark_workers.py --workers 1 2 4 --concurrency 32 --duration 20
+
+Pass --database-url to run against Postgres (the database is reused across runs) and
+--coordination-url to share the stream and alert state through Redis, as in production.
+Throughput can only scale up to the number of cores available to the backend and the database.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TESTS_DIR)
+
+from load_reports import ensure_model, parse_args as parse_load_args, run_load, spawn_backend  # noqa: E402
+
+
+def run(workers, args, load_args):
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='byne-workers-')}/bench.db"
+    load_args.spawn_backend = database_url
+    load_args.workers = workers
+    process = spawn_backend(load_args)
+    try:
+        ensure_model(load_args)
+        return run_load(load_args)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingestion throughput by worker count.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--database-url", help="Database for the backends (defaults to a fresh SQLite file per run)")
+    parser.add_argument("--coordination-url", help="Redis URL shared by the workers")
+    parser.add_argument("--port", type=int, default=8765, help="Port the backends listen on")
+    args, load_argv = parser.parse_known_args(argv)
+    load_args = parse_load_args(["--url", f"http://127.0.0.1:{args.port}", "--model", "benchmark"] + load_argv)
+    if args.coordination_url:
+        os.environ["COORDINATION_URL"] = args.coordination_url
+
+    results = {"cpus": os.cpu_count(), "concurrency": load_args.concurrency, "runs": []}
+    for workers in args.workers:
+        summary = run(workers, args, load_args)
+        results["runs"].append({
+            "workers": workers,
+            "requests_per_sec": summary["requests_per_sec"],
+            "latency_ms": summary["latency_ms"],
+            "error_rate": summary["error_rate"],
+        })
+    baseline = results["runs"][0]["requests_per_sec"]
+    for entry in results["runs"]:
+        entry["scaling"] = round(entry["requests_per_sec"] / baseline, 2) if baseline else None
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
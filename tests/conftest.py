@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# app.config reads these at import
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='byne-tests-')}/test.db")
+os.environ.setdefault("CORS_ORIGINS", "http://localhost:3000")
+os.environ.setdefault("BACKEND_HOST", "127.0.0.1")
+
+# Manual script against the hosted backend, not a pytest module
+collect_ignore = ["test_client.py"]
+
+
+@pytest.fixture
+def db():
+    """A session on a freshly created schema in the test database."""
+    # Imported from the models module so every table is registered on Base
+    from app.db.models import Base
+    from app.db.database import SessionLocal, engine
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
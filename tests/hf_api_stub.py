@@ -0,0 +1,59 @@
+"""
+Local stand-in for huggingface_hub.HfApi, covering the calls wrap_model.py makes when publishing.
+
+Repositories are directories under `root`. Files above `lfs_threshold` bytes are listed with LFS
+info (sha256), smaller ones with their git blob id, like the Hub does. Every commit is recorded
+in `commits` so a test can check which files were actually transferred:
+
+    api = LocalHfApi(tempfile.mkdtemp())
+    upload_to_huggingface_hub("my-model", "./tmp/modified_model", api=api)
+    print(api.commits[-1])
+"""
+import hashlib
+import os
+import shutil
+
+from huggingface_hub.hf_api import RepoFile
+
+
+class LocalHfApi:
+    def __init__(self, root, username="local-user", lfs_threshold=10 * 1024 * 1024):
+        self.root = root
+        self.username = username
+        self.lfs_threshold = lfs_threshold
+        self.commits = []
+
+    def whoami(self):
+        return {"name": self.username}
+
+    def create_repo(self, repo_id, exist_ok=False, **kwargs):
+        path = os.path.join(self.root, repo_id)
+        if os.path.exists(path) and not exist_ok:
+            raise FileExistsError(repo_id)
+        os.makedirs(path, exist_ok=True)
+
+    def list_repo_tree(self, repo_id, recursive=False, **kwargs):
+        repo_path = os.path.join(self.root, repo_id)
+        for root, _, files in os.walk(repo_path):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                with open(path, 'rb') as f:
+                    content = f.read()
+                entry = {
+                    "path": os.path.relpath(path, repo_path).replace(os.sep, "/"),
+                    "size": len(content),
+                    "oid": hashlib.sha1(f"blob {len(content)}\0".encode() + content).hexdigest(),
+                }
+                if len(content) >= self.lfs_threshold:
+                    entry["lfs"] = {"size": len(content), "oid": hashlib.sha256(content).hexdigest(),
+                                    "pointerSize": 134}
+                yield RepoFile(**entry)
+
+    def create_commit(self, repo_id, operations, commit_message, **kwargs):
+        paths = []
+        for operation in operations:
+            dst = os.path.join(self.root, repo_id, operation.path_in_repo)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(operation.path_or_fileobj, dst)
+            paths.append(operation.path_in_repo)
+        self.commits.append({"repo_id": repo_id, "message": commit_message, "paths": paths})
@@ -0,0 +1,248 @@
+"""
+Load generator for the report ingestion endpoint.
+
+Sends a realistic mix of success/fail reports (tracebacks of varying size, env_info blobs,
+machine ids repeating with a Zipf distribution) from concurrent workers for a fixed duration
+and prints throughput, latency percentiles and error rates as JSON.
+
+Against a running backend:
+    python tests/load_reports.py --url http://localhost:8000 --model finbert --concurrency 16 --duration 30
+
+Against a throwaway local backend on SQLite (or a local Postgres URL):
+    python tests/load_reports.py --spawn-backend sqlite:///./loadtest.db --duration 30
+
+See benchmark_workers.py for throughput across worker counts.
+"""
+import argparse
+import bisect
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+METHODS = [("forward", 0.8), ("generate", 0.15), ("__init__", 0.05)]
+ERRORS = [
+    "CUDA out of memory. Tried to allocate 2.00 GiB",
+    "Expected all tensors to be on the same device, but found at least two devices, cuda:0 and cpu!",
+    "index out of range in self",
+    "Input contains NaN, infinity or a value too large for dtype('float32').",
+    "The size of tensor a (512) must match the size of tensor b (1024) at non-singleton dimension 1",
+]
+OS_CHOICES = [("Linux", "5.15.0-91-generic"), ("Linux", "6.5.0-1014-aws"), ("Darwin", "23.4.0"), ("Windows", "10")]
+PYTHON_VERSIONS = ["3.9.18", "3.10.13", "3.11.7", "3.12.2"]
+TORCH_VERSIONS = ["2.1.2", "2.2.1", "2.3.0", "2.4.1"]
+TRANSFORMERS_VERSIONS = ["4.38.2", "4.41.2", "4.44.0", "4.45.1"]
+
+
+class ZipfSampler:
+    """Draws indexes in [0, n) with probability proportional to 1 / (rank + 1) ** s."""
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        weights = [1.0 / (rank + 1) ** s for rank in range(n)]
+        self.cum_weights = list(itertools.accumulate(weights))
+
+    def sample(self):
+        return bisect.bisect_left(self.cum_weights, self.rng.random() * self.cum_weights[-1])
+
+
+class ReportFactory:
+    def __init__(self, args, seed):
+        self.rng = random.Random(seed)
+        self.fail_ratio = args.fail_ratio
+        self.traceback_frames = args.traceback_frames
+        self.machine_ids = [hashlib.sha256(f"machine-{i}".encode()).hexdigest() for i in range(args.machines)]
+        self.machines = ZipfSampler(args.machines, args.zipf_s, self.rng)
+
+    def generate_method(self):
+        return self.rng.choices([m for m, _ in METHODS], weights=[w for _, w in METHODS])[0]
+
+    def generate_traceback(self, error):
+        # Frame count is log-normal: most tracebacks are short, a few are very deep
+        frames = max(1, int(self.rng.lognormvariate(0, 0.75) * self.traceback_frames))
+        lines = ["Traceback (most recent call last):"]
+        for i in range(frames):
+            lines.append(f'  File "/usr/lib/python3/site-packages/transformers/models/module_{i}.py", '
+                         f'line {self.rng.randint(1, 3000)}, in forward')
+            lines.append(f"    hidden_states = self.layer_{i}(hidden_states, attention_mask=attention_mask)")
+        lines.append(f"RuntimeError: {error}")
+        return "\n".join(lines)
+
+    def generate_env_info(self):
+        system, release = self.rng.choice(OS_CHOICES)
+        cuda = system == "Linux" and self.rng.random() < 0.7
+        packages = [f"package-{i}=={self.rng.randint(0, 9)}.{self.rng.randint(0, 30)}.0"
+                    for i in range(self.rng.randint(80, 250))]
+        packages += [f"torch=={self.rng.choice(TORCH_VERSIONS)}",
+                     f"transformers=={self.rng.choice(TRANSFORMERS_VERSIONS)}"]
+        return {
+            "os_info": {"system": system, "release": release, "version": "#1 SMP", "machine": "x86_64"},
+            "python_info": {"version": self.rng.choice(PYTHON_VERSIONS), "implementation": "CPython",
+                            "compiler": "GCC 11.4.0"},
+            "cuda_info": {"available": True, "version": "12.1"} if cuda else {"available": False},
+            "gpu_info": [],
+            "installed_packages": sorted(packages),
+            "relevant_env_variables": {"PATH": "/usr/local/bin:/usr/bin:/bin"},
+        }
+
+    def generate_report(self):
+        report = {
+            "machine_id": self.machine_ids[self.machines.sample()],
+            "status": "success",
+            "timestamp": datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+            "method": self.generate_method(),
+        }
+        if self.rng.random() < self.fail_ratio:
+            error = self.rng.choice(ERRORS)
+            report.update(status="fail", error=error, traceback=self.generate_traceback(error),
+                          env_info=self.generate_env_info())
+        return report
+
+
+def worker(index, args, url, deadline, results, lock):
+    factory = ReportFactory(args, seed=args.seed + index)
+    session = requests.Session()
+    latencies, statuses = [], {}
+    while time.perf_counter() < deadline:
+        payload = factory.generate_report()
+        start = time.perf_counter()
+        try:
+            status = session.post(url, json=payload, timeout=args.timeout).status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    with lock:
+        results["latencies"].extend(latencies)
+        for status, count in statuses.items():
+            results["statuses"][status] = results["statuses"].get(status, 0) + count
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_load(args):
+    url = f"{args.url}/reports/{args.model}/report"
+    results = {"latencies": [], "statuses": {}}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=worker, args=(i, args, url, deadline, results, lock))
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(results["latencies"])
+    total = len(latencies)
+    errors = sum(count for status, count in results["statuses"].items() if status != 200)
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        "url": url,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "requests_per_sec": round(total / elapsed, 2),
+        "latency_ms": {
+            "p50": to_ms(percentile(latencies, 50)),
+            "p95": to_ms(percentile(latencies, 95)),
+            "p99": to_ms(percentile(latencies, 99)),
+            "max": to_ms(latencies[-1] if latencies else None),
+        },
+        "error_rate": round(errors / total, 4) if total else None,
+        "status_counts": {str(status): count for status, count in results["statuses"].items()},
+    }
+
+
+def ensure_model(args):
+    """Register (or log in) a load-test user and create the target model if it is missing."""
+    requests.post(f"{args.url}/auth/register", json={
+        "username": args.username, "email": f"{args.username}@example.com", "password": args.password})
+    token = requests.post(f"{args.url}/auth/token", data={
+        "username": args.username, "password": args.password}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    if requests.get(f"{args.url}/models/{args.model}", headers=headers).status_code == 404:
+        requests.post(f"{args.url}/models/", json={"name": args.model}, headers=headers).raise_for_status()
+
+
+def spawn_backend(args):
+    port = args.url.rsplit(":", 1)[-1].split("/")[0]
+    env = dict(os.environ, DATABASE_URL=args.spawn_backend, SECRET_KEY=os.environ.get("SECRET_KEY", "loadtest"),
+               CORS_ORIGINS=os.environ.get("CORS_ORIGINS", "http://localhost"), BACKEND_HOST="127.0.0.1", PORT=port)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", port,
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    for _ in range(100):
+        try:
+            if requests.get(f"{args.url}/health", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The spawned backend did not become healthy")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the report ingestion endpoint.")
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--model", default="finbert", help="Model name to report against")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent workers")
+    parser.add_argument("--duration", type=float, default=10.0, help="Test duration in seconds")
+    parser.add_argument("--fail-ratio", type=float, default=0.1, help="Share of reports with status 'fail'")
+    parser.add_argument("--machines", type=int, default=10000, help="Size of the machine id population")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for repeat machine ids")
+    parser.add_argument("--traceback-frames", type=int, default=12, help="Median traceback depth in frames")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--spawn-backend", metavar="DATABASE_URL",
+                        help="Start a local backend on DATABASE_URL for the duration of the test")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes of the spawned backend")
+    parser.add_argument("--create-model", action="store_true",
+                        help="Create the model through the API before the test (implied by --spawn-backend)")
+    parser.add_argument("--username", default=f"loadtest-{uuid.uuid4().hex[:8]}")
+    parser.add_argument("--password", default="loadtest")
+    parser.add_argument("--output", help="Also write the JSON summary to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    process = spawn_backend(args) if args.spawn_backend else None
+    try:
+        if args.create_model or process:
+            ensure_model(args)
+        summary = run_load(args)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    output = json.dumps(summary, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
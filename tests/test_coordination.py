@@ -0,0 +1,98 @@
+import threading
+
+from app.coordination import Dispatcher, LocalCoordinator, RollingCounter
+
+
+def test_rolling_counter_expires_old_buckets():
+    counter = RollingCounter(window=10)
+    counter.record(False, now=100)
+    counter.record(True, now=100)
+    counter.record(True, now=105)
+    assert counter.totals(now=105) == {"success": 1, "fail": 2}
+
+    # The bucket of second 100 leaves the window at 110
+    assert counter.totals(now=109) == {"success": 1, "fail": 2}
+    assert counter.totals(now=110) == {"success": 0, "fail": 1}
+    assert counter.totals(now=115) == {"success": 0, "fail": 0}
+
+
+def test_rolling_counter_resets_after_a_whole_window():
+    counter = RollingCounter(window=10)
+    for second in range(100, 110):
+        counter.record(True, now=second)
+    assert counter.totals(now=109)["fail"] == 10
+    assert counter.totals(now=500) == {"success": 0, "fail": 0}
+    counter.record(False, now=500)
+    assert counter.totals(now=500) == {"success": 1, "fail": 0}
+
+
+def test_rolling_counter_records_late_events_in_the_newest_bucket():
+    counter = RollingCounter(window=10)
+    counter.record(False, now=120)
+    counter.record(True, now=105)
+    assert counter.totals(now=129) == {"success": 1, "fail": 1}
+    assert counter.totals(now=130) == {"success": 0, "fail": 0}
+
+
+def test_local_coordinator_counters_and_sets():
+    coordinator = LocalCoordinator()
+    coordinator.record("calls", 60, failed=True)
+    coordinator.record("calls", 60, failed=False)
+    assert coordinator.totals("calls", 60) == {"success": 1, "fail": 1}
+    assert coordinator.totals("missing", 60) == {"success": 0, "fail": 0}
+
+    assert coordinator.add_member("firing", "a")
+    assert not coordinator.add_member("firing", "a")
+    assert coordinator.members("firing") == {"a"}
+    assert coordinator.remove_member("firing", "a")
+    assert not coordinator.remove_member("firing", "a")
+    assert coordinator.members("firing") == set()
+
+
+def test_local_coordinator_publish_reaches_subscribers():
+    coordinator = LocalCoordinator()
+    received = []
+    coordinator.subscribe("reports", lambda key, message: received.append((key, message)))
+    coordinator.publish("reports", "tiny", "{}")
+    coordinator.publish("other", "tiny", "{}")
+    assert received == [("tiny", "{}")]
+
+
+def failing():
+    raise ConnectionError("backend down")
+
+
+def test_inline_dispatcher_drops_failures():
+    dispatcher = Dispatcher(LocalCoordinator())
+    calls = []
+    dispatcher.submit(failing)
+    dispatcher.submit(calls.append, 1)
+    assert calls == [1]
+
+
+class SharedCoordinator:
+    shared = True
+
+
+def test_queued_dispatcher_runs_calls_off_the_caller_and_drops_failures():
+    dispatcher = Dispatcher(SharedCoordinator())
+    done = threading.Event()
+    threads = []
+    dispatcher.submit(failing)
+    dispatcher.submit(lambda: threads.append(threading.current_thread()) or done.set())
+    assert done.wait(5)
+    assert threads[0] is not threading.current_thread()
+
+
+def test_queued_dispatcher_drops_calls_when_full(caplog):
+    dispatcher = Dispatcher(SharedCoordinator(), max_pending=1)
+    release = threading.Event()
+    started = threading.Event()
+    dispatcher.submit(lambda: started.set() or release.wait(5))
+    assert started.wait(5)
+    dispatcher.submit(lambda: None)
+    with caplog.at_level("WARNING", logger="app.coordination"):
+        dispatcher.submit(lambda: None)
+    release.set()
+    assert "Dropped 1 coordination call(s)" in caplog.text
+    assert "the queue is full" in caplog.text
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from app import environments
+from app.config import settings
+from app.db.maintenance import backfill_environments
+from app.db.models import Model, Report
+from app.environments import EnvironmentResolver
+
+LINUX = {"os_info": {"system": "Linux", "release": "6.1"}, "python_info": {"version": "3.11.4 (main)"}}
+MACOS = {"os_info": {"system": "Darwin", "release": "23.0"}, "python_info": {"version": "3.12.1 (main)"}}
+
+
+def add_model(db, name="tiny"):
+    model = Model(name=name)
+    db.add(model)
+    db.commit()
+    return model
+
+
+def add_report(db, model, machine_id, env_info=None, environment_id=None):
+    report = Report(model_id=model.id, machine_id=machine_id, status="success", method="forward",
+                    timestamp=datetime.utcnow(), env_info=env_info, environment_id=environment_id)
+    db.add(report)
+    db.commit()
+    return report
+
+
+def test_machine_without_environment_is_looked_up_again(db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(environments.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(settings, "ENVIRONMENT_MISS_TTL", 60)
+    model = add_model(db)
+    resolver = EnvironmentResolver(100)
+    assert resolver.resolve(db, model.id, "m1", None) is None
+
+    # Another worker stores the machine's environment
+    environment_id = resolver.environment_id(db, LINUX)
+    add_report(db, model, "m1", LINUX, environment_id)
+    assert resolver.resolve(db, model.id, "m1", None) is None
+
+    clock[0] += 61
+    assert resolver.resolve(db, model.id, "m1", None) == environment_id
+
+
+def test_report_with_environment_replaces_a_cached_miss(db):
+    model = add_model(db)
+    resolver = EnvironmentResolver(100)
+    assert resolver.resolve(db, model.id, "m1", None) is None
+
+    environment_id = resolver.resolve(db, model.id, "m1", LINUX)
+    assert resolver.resolve(db, model.id, "m1", None) == environment_id
+
+
+def test_backfill_carries_environments_across_batches(db):
+    model = add_model(db)
+    resolver = EnvironmentResolver(100)
+    macos = resolver.environment_id(db, MACOS)
+    reports = [
+        add_report(db, model, "m1", LINUX),
+        add_report(db, model, "m2"),
+        add_report(db, model, "m3", environment_id=macos),
+        add_report(db, model, "m1"),
+        add_report(db, model, "m3"),
+        add_report(db, model, "m2", MACOS),
+        add_report(db, model, "m1"),
+        add_report(db, model, "m2"),
+    ]
+
+    assert backfill_environments(db, batch_size=2) == 6
+
+    db.expire_all()
+    linux = resolver.environment_id(db, LINUX)
+    assert [db.get(Report, report.id).environment_id for report in reports] == [
+        linux, None, macos, linux, macos, macos, linux, macos]
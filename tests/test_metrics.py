@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import metrics
+
+
+def statement_seconds(operation):
+    return metrics.DB_STATEMENT_LATENCY.labels(operation)._sum.get()
+
+
+def test_failed_statement_doesnt_skew_the_next_duration(monkeypatch):
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    clock = iter([10.0, 100.0, 101.5])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(clock))
+    monkeypatch.setattr(metrics.settings, "SLOW_QUERY_MS", 0)
+
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        before = statement_seconds("SELECT")
+        conn.execute(text("SELECT 1"))
+        assert statement_seconds("SELECT") - before == pytest.approx(1.5)
+        assert "query_start_time" not in conn.info
+    engine.dispose()
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.auth import get_current_user, get_current_user_from_query
+from app.db.models import Job, Model, Report
+from app.main import app
+
+READ_PATHS = [
+    "/models/tiny",
+    "/models/tiny/unique_users",
+    "/models/tiny/users/activity",
+    "/models/tiny/users/retention",
+    "/models/tiny/history",
+    "/models/tiny/error_rates",
+    "/models/tiny/breakdown?facet=os_system",
+    "/reports/tiny",
+    "/reports/tiny/stream?token=test",
+]
+
+
+@pytest.fixture
+def client(db):
+    app.dependency_overrides[get_current_user] = lambda: None
+    app.dependency_overrides[get_current_user_from_query] = lambda: None
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def model(db):
+    model = Model(name="tiny")
+    db.add(model)
+    db.commit()
+    db.add(Report(model_id=model.id, machine_id="m1", status="success", method="forward", timestamp=datetime.utcnow()))
+    db.commit()
+    return model
+
+
+def mark_deleting(db, model):
+    job = Job(kind="delete_model", target=model.name, status="running", deleted_count=0)
+    db.add(job)
+    db.commit()
+    model.deletion_job_id = job.id
+    db.commit()
+
+
+def test_reads_serve_a_model_until_its_deletion_starts(client, model):
+    assert client.get("/models/tiny").json()["name"] == "tiny"
+    assert client.get("/models/tiny/error_rates").status_code == 200
+    assert len(client.get("/reports/tiny").json()) == 1
+
+
+@pytest.mark.parametrize("path", READ_PATHS)
+def test_reads_hide_a_model_being_deleted(client, db, model, path):
+    mark_deleting(db, model)
+    response = client.get(path)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Model not found"
+
+
+def test_listing_and_updates_hide_a_model_being_deleted(client, db, model):
+    mark_deleting(db, model)
+    assert client.get("/models/").json() == []
+    assert client.put("/models/tiny", json={"name": "renamed"}).status_code == 404
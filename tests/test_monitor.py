@@ -0,0 +1,57 @@
+import pytest
+
+from app.coordination import LocalCoordinator
+from app.monitor import ErrorRateMonitor, WebhookSender
+from app.schemas.monitor import AlertRule
+from webhook_stub import WebhookStub
+
+
+@pytest.fixture
+def stub():
+    with WebhookStub() as stub:
+        yield stub
+
+
+def make_monitor(stub, **rule):
+    rule = AlertRule(**{"name": "errors", "webhook_url": stub.url, "threshold": 0.5, "min_requests": 4, **rule})
+    return ErrorRateMonitor(window=60, rules=[rule], sender=WebhookSender(timeout=2), coordinator=LocalCoordinator())
+
+
+def test_alert_fires_then_resolves(stub):
+    monitor = make_monitor(stub)
+    for _ in range(4):
+        monitor.record("tiny", "forward", failed=True)
+    firing = stub.wait_for(1)
+    assert [payload["status"] for payload in firing] == ["firing"]
+    assert firing[0]["rule"] == "errors"
+    assert (firing[0]["model"], firing[0]["method"], firing[0]["fail"]) == ("tiny", "forward", 4)
+    assert monitor.error_rates("tiny")[0]["firing"] == ["errors"]
+
+    # Still over the threshold: no repeated alert
+    monitor.record("tiny", "forward", failed=True)
+    for _ in range(6):
+        monitor.record("tiny", "forward", failed=False)
+
+    received = stub.wait_for(2)
+    assert [payload["status"] for payload in received] == ["firing", "resolved"]
+    assert received[1]["error_rate"] < 0.5
+    assert monitor.error_rates("tiny")[0]["firing"] == []
+
+
+def test_no_alert_below_min_requests(stub):
+    rules = [AlertRule(name="errors", webhook_url=stub.url, threshold=0.5, min_requests=10),
+             AlertRule(name="probe", webhook_url=stub.url, threshold=0.5, method="probe", min_requests=1)]
+    monitor = ErrorRateMonitor(window=60, rules=rules, sender=WebhookSender(timeout=2), coordinator=LocalCoordinator())
+    for _ in range(5):
+        monitor.record("tiny", "forward", failed=True)
+    monitor.record("tiny", "probe", failed=True)
+    # Alerts are delivered in order by one thread, so the probe arriving alone means nothing was sent before it
+    assert [payload["rule"] for payload in stub.wait_for(1)] == ["probe"]
+
+
+def test_rules_only_match_their_model(stub):
+    monitor = make_monitor(stub, model="other")
+    for _ in range(4):
+        monitor.record("tiny", "forward", failed=True)
+    assert monitor.error_rates("tiny")[0]["firing"] == []
+    assert monitor.error_rates("tiny")[0]["fail"] == 4
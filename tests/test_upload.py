@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from hf_api_stub import LocalHfApi
+from wrap_model import upload_to_huggingface_hub
+
+FILES = {
+    "config.json": b'{"architectures": ["ModifiedBert"]}',
+    "modeling_modified.py": b"class ModifiedBert: pass\n",
+    "model.safetensors": b"\0" * 4096,
+}
+
+
+def write_files(directory, files):
+    for name, content in files.items():
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+
+@pytest.fixture
+def api(tmp_path):
+    # Small threshold so the weights are compared like LFS files
+    return LocalHfApi(str(tmp_path / "hub"), lfs_threshold=1024)
+
+
+def test_first_upload_commits_every_file(api, tmp_path):
+    save_directory = str(tmp_path / "out")
+    write_files(save_directory, FILES)
+
+    assert upload_to_huggingface_hub("tiny", save_directory, api=api) == "local-user/tiny"
+
+    assert len(api.commits) == 1
+    assert sorted(api.commits[0]["paths"]) == sorted(FILES)
+    assert not os.path.exists(save_directory)
+
+
+def test_reupload_commits_only_changed_files(api, tmp_path):
+    save_directory = str(tmp_path / "out")
+    write_files(save_directory, FILES)
+    upload_to_huggingface_hub("tiny", save_directory, api=api)
+
+    write_files(save_directory, dict(FILES, **{"config.json": b'{"architectures": ["ModifiedBertV2"]}',
+                                                "nested/extra.py": b"EXTRA = 1\n"}))
+    upload_to_huggingface_hub("tiny", save_directory, api=api)
+
+    assert len(api.commits) == 2
+    assert sorted(api.commits[1]["paths"]) == ["config.json", "nested/extra.py"]
+
+
+def test_same_size_change_is_committed(api, tmp_path):
+    save_directory = str(tmp_path / "out")
+    write_files(save_directory, FILES)
+    upload_to_huggingface_hub("tiny", save_directory, api=api)
+
+    write_files(save_directory, dict(FILES, **{"model.safetensors": b"\1" * 4096}))
+    upload_to_huggingface_hub("tiny", save_directory, api=api)
+
+    assert api.commits[1]["paths"] == ["model.safetensors"]
+
+
+def test_unchanged_upload_makes_no_commit(api, tmp_path):
+    save_directory = str(tmp_path / "out")
+    write_files(save_directory, FILES)
+    upload_to_huggingface_hub("tiny", save_directory, api=api)
+
+    write_files(save_directory, FILES)
+    upload_to_huggingface_hub("tiny", save_directory, api=api)
+
+    assert len(api.commits) == 1
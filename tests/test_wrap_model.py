@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import sys
+
+import pytest
+import torch
+from transformers import AutoModelForSequenceClassification, BertConfig, BertForSequenceClassification, BertTokenizer
+
+import wrap_model
+
+HOST = "http://127.0.0.1:9/reports/tiny"
+
+
+def digests(directory):
+    return {name: hashlib.sha256(open(os.path.join(directory, name), "rb").read()).hexdigest()
+            for name in sorted(os.listdir(directory))}
+
+
+@pytest.fixture
+def tiny_model(tmp_path):
+    source = tmp_path / "source"
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "a", "b"]))
+    BertTokenizer(str(vocab)).save_pretrained(str(source))
+    config = BertConfig(hidden_size=8, num_attention_heads=2, num_hidden_layers=1, intermediate_size=8, vocab_size=7)
+    BertForSequenceClassification(config).save_pretrained(str(source))
+    return str(source)
+
+
+def test_weightless_wrap_links_original_files(tiny_model, tmp_path):
+    output = str(tmp_path / "out")
+    result = wrap_model.wrap_model(tiny_model, "tiny", host=HOST, save_directory=output, upload=False)
+
+    assert result["output"] == output
+    assert os.path.samefile(os.path.join(output, "model.safetensors"), os.path.join(tiny_model, "model.safetensors"))
+    with open(os.path.join(output, "config.json")) as f:
+        config = json.load(f)
+    assert config["architectures"] == ["ModifiedBertForSequenceClassificationWithHook"]
+    for reference in config["auto_map"].values():
+        assert os.path.exists(os.path.join(output, reference.split(".")[0] + ".py"))
+    # The original config is left as it was
+    with open(os.path.join(tiny_model, "config.json")) as f:
+        assert json.load(f)["architectures"] == ["BertForSequenceClassification"]
+
+
+def test_rewrap_into_same_directory_leaves_source_unchanged(tiny_model, tmp_path):
+    output = str(tmp_path / "out")
+    before = digests(tiny_model)
+
+    wrap_model.wrap_model(tiny_model, "tiny", host=HOST, save_directory=output, upload=False, weightless=True)
+    wrap_model.wrap_model(tiny_model, "tiny", host=HOST, save_directory=output, upload=False, weightless=False)
+
+    assert digests(tiny_model) == before
+    assert not os.path.samefile(os.path.join(output, "special_tokens_map.json"),
+                                os.path.join(tiny_model, "special_tokens_map.json"))
+
+
+def test_stale_output_is_cleared(tiny_model, tmp_path):
+    output = tmp_path / "out"
+    output.mkdir()
+    (output / "stale.bin").write_bytes(b"left over")
+
+    wrap_model.wrap_model(tiny_model, "tiny", host=HOST, save_directory=str(output), upload=False)
+
+    assert not (output / "stale.bin").exists()
+
+
+def test_refuses_save_directory_inside_source(tiny_model):
+    before = digests(tiny_model)
+    with pytest.raises(wrap_model.WrapError):
+        wrap_model.wrap_model(tiny_model, "tiny", host=HOST, save_directory=os.path.join(tiny_model, "out"), upload=False)
+    assert digests(tiny_model) == before
+
+
+class RepoFilesApi:
+    def __init__(self, files):
+        self.files = files
+
+    def list_repo_files(self, repo_id):
+        return self.files
+
+
+def test_download_skips_unused_weight_formats(monkeypatch):
+    calls = []
+    monkeypatch.setattr(wrap_model, "snapshot_download", lambda **kwargs: calls.append(kwargs) or "/cache/model")
+
+    api = RepoFilesApi(["config.json", "model.safetensors", "pytorch_model.bin", "tf_model.h5"])
+    assert wrap_model.locate_model_files("org/model", api=api) == "/cache/model"
+    assert "*.h5" in calls[0]["ignore_patterns"]
+    assert "pytorch_model*.bin" in calls[0]["ignore_patterns"]
+
+    wrap_model.locate_model_files("org/model", api=RepoFilesApi(["config.json", "pytorch_model.bin"]))
+    assert "pytorch_model*.bin" not in calls[1]["ignore_patterns"]
+
+
+def test_failed_wrap_leaves_no_output(tmp_path):
+    source = tmp_path / "broken"
+    source.mkdir()
+    (source / "config.json").write_text("{}")
+    output = tmp_path / "out"
+
+    with pytest.raises(Exception):
+        wrap_model.wrap_model(str(source), "broken", host=HOST, save_directory=str(output), upload=False)
+    assert not output.exists()
+
+
+@pytest.mark.parametrize("entry", [
+    {"source": "org/model", "target": "../.."},
+    {"source": "org/model", "target": "/etc"},
+    {"source": "org/model", "target": "model", "save_directory": "/tmp"},
+    {"source": "org/model", "target": "model", "save_directory": "output/../elsewhere"},
+    {"source": "org/model", "target": "."},
+    {"target": "model"},
+])
+def test_entry_save_directory_rejects_paths_outside_output_dir(entry, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(wrap_model.WrapError):
+        wrap_model.entry_save_directory(entry, "output")
+
+
+def test_entry_save_directory_inside_output_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert wrap_model.entry_save_directory({"source": "a", "target": "model"}, "output") == os.path.join("output", "model")
+    entry = {"source": "a", "target": "model", "save_directory": "output/custom"}
+    assert wrap_model.entry_save_directory(entry, "output") == "output/custom"
+
+
+def test_conflicting_entries():
+    save_directories = {0: "out/a", 1: "out/b", 2: "out/a", 3: "out/b-c", 4: "out/b/nested", 5: "out/d"}
+    assert sorted(wrap_model.conflicting_entries(save_directories)) == [0, 1, 2, 4]
+
+
+def test_manifest_rejects_conflicting_entries_before_wrapping(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output" / "keep").mkdir(parents=True)
+    entries = [
+        {"source": "org/a", "target": "same"},
+        {"source": "org/b", "target": "same"},
+        {"source": "org/c", "target": "../output"},
+    ]
+
+    results = wrap_model.wrap_manifest(entries, "output", workers=1, weightless=True, upload=False)
+
+    assert [result["status"] for result in results] == ["fail", "fail", "fail"]
+    assert all("WrapError" in result["error"] for result in results)
+    assert (tmp_path / "output" / "keep").exists()
+
+
+def test_hooks_mode_reports_successful_and_failing_forward(tiny_model, tmp_path, monkeypatch):
+    # The generated code keeps its machine id and env_info cache under the working directory
+    monkeypatch.chdir(tmp_path)
+    output = str(tmp_path / "out")
+    wrap_model.wrap_model(tiny_model, "tiny", host=HOST, save_directory=output, upload=False, instrumentation="hooks")
+    model = AutoModelForSequenceClassification.from_pretrained(output, trust_remote_code=True).eval()
+    sent = []
+    monkeypatch.setattr(sys.modules[type(model).__module__], "send_report", sent.append)
+
+    with torch.no_grad():
+        model(torch.tensor([[2, 5, 6, 3]]))
+        with pytest.raises(IndexError):
+            # Token ids beyond the vocabulary make the embedding lookup raise
+            model(torch.tensor([[2, 50, 3]]))
+
+    assert [(report["method"], report["status"]) for report in sent] == [("forward", "success"), ("forward", "fail")]
+    assert sent[1]["error"]
+    assert "IndexError" in sent[1]["traceback"]
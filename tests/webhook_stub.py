@@ -0,0 +1,77 @@
+"""
+Local stand-in for an alert webhook receiver.
+
+Records every JSON payload POSTed to it. Use it from a test:
+
+    with WebhookStub() as stub:
+        # configure ALERT_RULES with "webhook_url": stub.url, then send reports
+        payload = stub.wait_for(1)
+
+or run it standalone and watch alerts arrive:
+
+    python tests/webhook_stub.py --port 9000
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookStub:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.received = []
+        self.condition = threading.Condition()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub.condition:
+                    stub.received.append(json.loads(body or b"null"))
+                    stub.condition.notify_all()
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def wait_for(self, count, timeout=5):
+        """Block until at least `count` payloads arrived and return them."""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.received) >= count, timeout=timeout)
+            return list(self.received)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print alert webhook payloads as they arrive.")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    stub = WebhookStub(port=args.port).start()
+    print(f"Listening on {stub.url}")
+    seen = 0
+    try:
+        while True:
+            received = stub.wait_for(seen + 1, timeout=1)
+            for payload in received[seen:]:
+                print(json.dumps(payload))
+            seen = len(received)
+    except KeyboardInterrupt:
+        stub.stop()